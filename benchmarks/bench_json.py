@@ -0,0 +1,40 @@
+"""
+Compare the JSON backends (see lemoncheesecake_requests.set_json_backend) on typical API payload sizes.
+
+Usage: python benchmarks/bench_json.py [NUMBER]
+"""
+
+import sys
+import json
+
+from lemoncheesecake_requests import JsonBackend, OrjsonBackend, set_json_backend, Logger
+
+from common import bench, make_json_payload, make_response
+
+
+def main(number):
+    backends = [JsonBackend()]
+    try:
+        backends.append(OrjsonBackend())
+    except ImportError:
+        print("orjson is not installed, only the standard json module will be benchmarked\n")
+
+    print("%-8s %-10s %12s %12s %12s" % ("backend", "payload", "loads", "dumps", "response"))
+    for nb_items in 10, 1000, 20000:
+        content = json.dumps(make_json_payload(nb_items)).encode("utf-8")
+        size = "%dKB" % (len(content) // 1024)
+        for backend in backends:
+            set_json_backend(backend)
+            data = backend.loads(content)
+            # "response" is what lemoncheesecake-requests does for a JSON response: decode + pretty-print
+            print("%-8s %-10s %10.3fms %10.3fms %10.3fms" % (
+                backend.name, size,
+                bench(lambda: backend.loads(content), number) * 1000,
+                bench(lambda: backend.dumps(data), number) * 1000,
+                bench(lambda: Logger.format_response_body(make_response("application/json", content)), number) * 1000,
+            ))
+    set_json_backend("json")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
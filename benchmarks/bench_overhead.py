@@ -0,0 +1,83 @@
+"""
+Measure the overhead added by lemoncheesecake-requests on top of requests.
+
+Usage: python benchmarks/bench_overhead.py [NUMBER]
+"""
+
+import sys
+
+import requests
+
+from lemoncheesecake.matching import is_integer, is_list
+from lemoncheesecake_requests import Session, Logger, StatusCodeMismatch, is_4xx
+
+from common import http_server, no_report, bench, make_bodies, make_response
+
+
+def bench_requests(number):
+    print("Per-request time (local server, small JSON body):")
+    with http_server() as base_url:
+        sessions = (
+            ("requests.Session", requests.Session(), base_url),
+            ("Session + Logger.off()", Session(base_url=base_url, logger=Logger.off()), ""),
+            ("Session + Logger.no_response_body()", Session(base_url=base_url, logger=Logger.no_response_body()), ""),
+            ("Session + Logger.on()", Session(base_url=base_url, logger=Logger.on()), ""),
+        )
+        baseline = None
+        for name, session, url_prefix in sessions:
+            session.get(url_prefix + "/")  # open the connection
+            elapsed = bench(lambda: session.get(url_prefix + "/"), number)
+            if baseline is None:
+                baseline = elapsed
+            print("  %-40s %10.3fms  (%+.3fms)" % (name, elapsed * 1000, (elapsed - baseline) * 1000))
+            session.close()
+    print()
+
+
+def bench_format_response_body(number):
+    print("Logger.format_response_body:")
+    for name, (content_type, body) in make_bodies().items():
+        elapsed = bench(lambda: Logger.format_response_body(make_response(content_type, body)), number)
+        print("  %-40s %10.3fms" % (name, elapsed * 1000))
+    print()
+
+
+def bench_status_code_mismatch(number):
+    print("StatusCodeMismatch.__str__:")
+    for name, (content_type, body) in make_bodies().items():
+        if not name.startswith("json"):
+            continue
+        matcher = is_4xx()
+
+        def func():
+            resp = make_response(content_type, body)
+            str(StatusCodeMismatch(resp, matcher, matcher.matches(resp.status_code)))
+        print("  %-40s %10.3fms" % (name, bench(func, number) * 1000))
+    print()
+
+
+def bench_check_json(number):
+    print("Response.check_json / require_json / assert_json (with and without the JSON already decoded):")
+    expected = {"total": is_integer(), "items": is_list()}
+    for name, (content_type, body) in make_bodies().items():
+        if not name.startswith("json"):
+            continue
+        for method in "check_json", "require_json", "assert_json":
+            decoded = make_response(content_type, body)
+            decoded.json()
+            cold = bench(lambda: getattr(make_response(content_type, body), method)(expected), number)
+            warm = bench(lambda: getattr(decoded, method)(expected), number)
+            print("  %-40s %10.3fms %10.3fms" % (f"{method} {name}", cold * 1000, warm * 1000))
+    print()
+
+
+def main(number):
+    with no_report():
+        bench_requests(number * 20)
+        bench_format_response_body(number)
+        bench_status_code_mismatch(number)
+        bench_check_json(number)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
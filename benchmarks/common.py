@@ -0,0 +1,134 @@
+"""
+Helpers shared by the benchmarks.
+
+The benchmarks are run outside of a lemoncheesecake run, the lemoncheesecake logging functions used by
+lemoncheesecake-requests are then replaced by no-op functions (attachments are still written to disk) so that
+only the lemoncheesecake-requests overhead is measured.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import timeit
+import types
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch
+
+import requests
+
+from lemoncheesecake_requests import Response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    bodies = {}
+
+    def do_GET(self):
+        content_type, body = self.bodies.get(self.path, ("application/json", b"{}"))
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def http_server(bodies=None):
+    """
+    Run a local HTTP server serving the given bodies (a dict path => (content type, body)),
+    it yields the server base URL.
+    """
+    _Handler.bodies = bodies or {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield "http://%s:%d" % server.server_address
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def no_report():
+    """
+    Replace the lemoncheesecake reporting functions used by lemoncheesecake-requests with no-op functions.
+    """
+    attachment_dir = tempfile.mkdtemp()
+
+    @contextlib.contextmanager
+    def prepare_attachment(filename, description=None):
+        yield os.path.join(attachment_dir, filename)
+
+    def save_attachment_content(content, filename, description=None):
+        with prepare_attachment(filename) as path:
+            with open(path, "w" if isinstance(content, str) else "wb") as fh:
+                fh.write(content)
+
+    noop = lambda *args, **kwargs: None
+    lcc = types.SimpleNamespace(
+        log_debug=noop, log_info=noop, log_check=noop,
+        prepare_attachment=prepare_attachment, save_attachment_content=save_attachment_content
+    )
+    with patch("lemoncheesecake_requests.lcc", lcc), patch("lemoncheesecake.matching.operations.log_check", noop):
+        yield
+
+
+def bench(func, number, repeat=3) -> float:
+    """
+    Return the best time (in seconds) of one call to func.
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def make_json_payload(nb_items):
+    return {
+        "total": nb_items,
+        "items": [
+            {
+                "id": i,
+                "name": f"item #{i}",
+                "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit é à ü",
+                "price": i * 1.25,
+                "tags": ["foo", "bar", "baz"],
+                "active": i % 2 == 0,
+                "owner": {"id": i * 10, "login": f"user{i}", "email": None},
+            }
+            for i in range(nb_items)
+        ]
+    }
+
+
+def make_bodies(sizes=(10, 1000, 20000)):
+    """
+    Return JSON, text and binary bodies of several sizes as a dict name => (content type, body).
+    """
+    bodies = {}
+    for nb_items in sizes:
+        json_body = json.dumps(make_json_payload(nb_items)).encode("utf-8")
+        size = len(json_body)
+        bodies[f"json-{size // 1024}KB"] = "application/json", json_body
+        bodies[f"text-{size // 1024}KB"] = "text/plain", (b"lorem ipsum dolor sit amet\n" * (size // 27 + 1))[:size]
+        bodies[f"binary-{size // 1024}KB"] = "application/octet-stream", os.urandom(size)
+    return bodies
+
+
+def make_response(content_type, body) -> Response:
+    """
+    Build a response (as returned by a Session) without performing any HTTP request.
+    """
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = "http://www.example.net/"
+    resp.headers["Content-Type"] = content_type
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp._content = body
+    resp.request = requests.Request("GET", resp.url).prepare()
+    return Response.cast(resp, requests.Request("GET", resp.url))
@@ -1,20 +1,64 @@
 import base64
+import codecs
 import inspect
+import collections
 import collections.abc
+import concurrent.futures
+import contextlib
+import contextvars
+import copy
+import datetime
+import email.utils
+import hashlib
 import io
+import itertools
 import json
-from typing import Union, Optional
+import math
+import mimetypes
+import multiprocessing
+import os
+import queue
+import random
+import re
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import Union, Optional, Iterable, List, Tuple, Any
 
 import requests
+import requests.adapters
+import urllib3
+import urllib3.connection
+import urllib3.exceptions
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 import lemoncheesecake.api as lcc
+import lemoncheesecake.session
+from lemoncheesecake.exceptions import AbortTest
 from lemoncheesecake.matching import *
 from lemoncheesecake.matching.matcher import Matcher, MatchResult, MatcherDescriptionTransformer
 
 __all__ = (
-    "Session", "Response", "Logger",
+    "Session", "AsyncSession", "Response", "Timings", "Logger",
     "is_2xx", "is_3xx", "is_4xx", "is_5xx",
-    "LemoncheesecakeRequestsException", "StatusCodeMismatch"
+    "JsonBackend", "OrjsonBackend", "set_json_backend", "get_json_backend",
+    "Cassette", "CassetteAdapter", "HttpCache", "LatencyHistogram", "LatencyStats", "LatencyBudget",
+    "LoadResult", "load_with_processes", "RetryPolicy", "Attempt", "RateLimit", "Expectation",
+    "LemoncheesecakeRequestsException", "StatusCodeMismatch", "ResponseTooSlow", "InteractionNotRecorded"
 )
 
 
@@ -35,26 +79,600 @@ class StatusCodeMismatch(LemoncheesecakeRequestsException):
         self.matcher = matcher
         self.match_result = match_result
 
+    def _format_response_body(self):
+        # the body is formatted according to the JSON preview settings of the logger of the response, if any
+        logger = getattr(self.response, "_logger", None)
+        if logger is not None and logger.json_preview:
+            kind, js, _ = logger._get_response_body_kind(self.response)
+            if kind == "json":
+                return logger._format_response_json_preview(self.response, js)[0]
+        return Logger.format_response_body(self.response)
+
     def __str__(self):
-        return (
+        content = (
             f"expected status code {self.matcher.build_description(MatcherDescriptionTransformer())}," +
-            f" {self.match_result.description}\n\n" +
-            "\n\n".join(
-                # some serializing methods can return empty data, that's why we filter them out
-                filter(bool, (
-                    Logger.format_request_line(
-                        self.response.request.method, self.response.request.url
-                    ),
-                    Logger.format_request_headers(self.response.request.headers),
-                    Logger.format_request_body(self.response.orig_request, self.response.request),
-                    Logger.format_response_line(self.response),
-                    Logger.format_response_headers(self.response.headers),
-                    Logger.format_response_body(self.response)
-                ))
+            f" {self.match_result.description}\n\n"
+        )
+        attempts = getattr(self.response, "attempts", [])
+        if len(attempts) > 1:
+            content += "Attempts:\n%s\n\n" % "\n".join(
+                f"  #{number}: {attempt}" for number, attempt in enumerate(attempts, 1)
             )
+        return content + "\n\n".join(
+            # some serializing methods can return empty data, that's why we filter them out
+            filter(bool, (
+                Logger.format_request_line(
+                    self.response.request.method, self.response.request.url
+                ),
+                Logger.format_request_headers(self.response.request.headers),
+                Logger.format_request_body(self.response.orig_request, self.response.request),
+                Logger.format_response_line(self.response),
+                Logger.format_response_headers(self.response.headers),
+                self._format_response_body()
+            ))
+        )
+
+
+class ResponseTooSlow(LemoncheesecakeRequestsException):
+    """
+    This exception is raised by :py:meth:`Response.raise_unless_faster_than`.
+
+    .. versionadded:: 0.5.0
+    """
+
+    def __init__(self, response: "Response", limit: float):
+        self.response = response
+        self.limit = limit
+
+    def __str__(self):
+        return (
+            f"expected response time to be less than {self.limit:.03f}s,"
+            f" got {self.response.elapsed.total_seconds():.03f}s\n\n" +
+            Logger.format_request_line(self.response.request.method, self.response.request.url) + "\n\n" +
+            Logger.format_response_line(self.response, with_timings=True)
         )
 
 
+# When set, report logging operations are held in this buffer instead of being performed immediately,
+# this is used to keep the logs of requests performed concurrently grouped in the report
+_log_buffer: "contextvars.ContextVar[Optional[list]]" = contextvars.ContextVar(
+    "lemoncheesecake_requests_log_buffer", default=None
+)
+
+
+def _emit(func, *args):
+    buffer = _log_buffer.get()
+    if buffer is None:
+        func(*args)
+    else:
+        buffer.append((func, args))
+
+
+def _flush(buffer):
+    # the buffered operations are emitted to the enclosing buffer, if any
+    for func, args in buffer:
+        _emit(func, *args)
+    del buffer[:]
+
+
+_ATTACHMENT_CHUNK_SIZE = 64 * 1024
+_JSON_SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+# The report location and the thread of the test on behalf of which the requests are performed by worker threads
+# (see Session.map() and Session.load()), lemoncheesecake only knows the location of the threads it manages
+_caller: "contextvars.ContextVar[Optional[Tuple[Any, int]]]" = contextvars.ContextVar(
+    "lemoncheesecake_requests_caller", default=None
+)
+
+
+def _get_caller():
+    # NB: this relies on lemoncheesecake internals, the location is None if we are not within a lemoncheesecake run
+    caller = _caller.get()
+    if caller is not None:
+        return caller
+    try:
+        location = lemoncheesecake.session.Session.get().cursor.location
+    except (AssertionError, AttributeError):
+        location = None
+    return location, threading.get_ident()
+
+
+def _get_report_location():
+    return _get_caller()[0]
+
+
+def _is_report_location_failed(location) -> bool:
+    return location is not None and not lemoncheesecake.session.Session.get().is_successful(location)
+
+
+def _move_attachment(path, filename, description):
+    with lcc.prepare_attachment(filename, description) as attachment_path:
+        shutil.move(path, attachment_path)
+
+
+def _save_attachment(filename, description, write):
+    # write is a callable that takes a binary file object as argument and writes the attachment content into it
+    if _log_buffer.get() is None:
+        with lcc.prepare_attachment(filename, description) as path:
+            with open(path, "wb") as fh:
+                write(fh)
+    else:
+        # the attachment cannot be registered right now (it would not follow the buffered logs
+        # and prepare_attachment may be called from a thread unknown to lemoncheesecake)
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        _emit(_move_attachment, path, filename, description)
+
+
+def _get_body_filename(headers, kind=None) -> str:
+    content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if kind == "json":
+        extension = ".json"
+    else:
+        extension = mimetypes.guess_extension(content_type) if content_type else None
+        if not extension:
+            extension = ".txt" if kind == "text" else ".bin"
+    return "body" + extension
+
+
+# the classification of a response body as text or binary relies on its Content-Type, the charset detection
+# (which is slow on large bodies) is performed only when it cannot be avoided, and on a bounded prefix
+_BODY_SNIFF_SIZE = 4096
+
+_BINARY_CONTENT_TYPE_PREFIXES = ("image/", "audio/", "video/", "font/", "model/")
+_BINARY_CONTENT_TYPES = frozenset((
+    "application/octet-stream", "application/pdf", "application/wasm", "application/java-archive",
+    "application/zip", "application/gzip", "application/x-gzip", "application/x-tar", "application/x-bzip2",
+    "application/x-xz", "application/x-7z-compressed", "application/x-rar-compressed", "application/zstd",
+    "application/protobuf", "application/x-protobuf", "application/vnd.google.protobuf", "application/grpc",
+    "application/msgpack", "application/x-msgpack", "application/cbor", "application/vnd.apache.avro+binary",
+))
+_TEXT_CONTENT_TYPES = frozenset((
+    "application/json", "application/xml", "application/javascript", "application/ecmascript",
+    "application/x-www-form-urlencoded", "application/yaml", "application/x-yaml", "application/x-ndjson",
+    "application/graphql", "application/sql", "image/svg+xml",
+))
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _parse_content_type(headers) -> Tuple[str, Optional[str]]:
+    # return the media type and the declared charset (if valid)
+    media_type, *params = headers.get("Content-Type", "").split(";")
+    charset = None
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            try:
+                charset = codecs.lookup(value.strip().strip("\"'")).name
+            except LookupError:
+                pass
+    return media_type.strip().lower(), charset
+
+
+def _is_binary_content_type(media_type: str) -> bool:
+    return media_type not in _TEXT_CONTENT_TYPES and (
+        media_type in _BINARY_CONTENT_TYPES or media_type.startswith(_BINARY_CONTENT_TYPE_PREFIXES)
+    )
+
+
+def _is_text_content_type(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in _TEXT_CONTENT_TYPES or \
+        media_type.endswith(("+json", "+xml"))
+
+
+def _may_be_json(resp: requests.Response) -> bool:
+    # look at the first significant byte not to try to decode as JSON what obviously is not, if no encoding
+    # is declared, requests falls back to a charset detection of the whole body when the JSON encoding
+    # cannot be guessed: this is checked beforehand on a bounded prefix
+    content = resp.content
+    head = content
+    for bom, _ in _BOMS:
+        if head.startswith(bom):
+            head = head[len(bom):]
+            break
+    head = head[:64].lstrip(b" \t\r\n\x00")
+    if not (head[:1] in (b"{", b"[", b'"', b"-", b"t", b"f", b"n") or head[:1].isdigit()):
+        return False
+    if resp.encoding is None:
+        encoding = requests.utils.guess_json_utf(content)
+        if encoding is None:
+            return False
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(content[:_BODY_SNIFF_SIZE])
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def _sniff_encoding(content: bytes) -> Optional[str]:
+    # guess the encoding of a body from its first bytes, None means that it does not look like text
+    prefix = content[:_BODY_SNIFF_SIZE]
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    if b"\x00" in prefix:
+        return None
+    try:
+        # the prefix may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=len(prefix) == len(content))
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if requests.compat.chardet is None:  # pragma: no cover
+        return None
+    return requests.compat.chardet.detect(prefix)["encoding"]
+
+
+def _format_count(count: int, noun: str) -> str:
+    return f"{count:,} {noun}" + ("" if count == 1 else "s")
+
+
+def _format_json_preview(data, max_items: int, max_keys: int, max_depth: int,
+                         max_string_length: int, max_lines: int) -> Tuple[str, bool]:
+    # pretty-print (the same way as JsonBackend) a bounded preview of the JSON data in a single pass, only the
+    # elements actually shown are visited, return the preview and whether or not something has been elided;
+    # besides the per-level limits, the whole preview is limited to max_lines lines (not counting the lines
+    # reporting elided elements) so that its size does not grow with the product of the per-level limits
+    elided = False
+    lines_left = max_lines - 1  # the first line
+
+    def take_line():
+        nonlocal lines_left
+        if lines_left <= 0:
+            return False
+        lines_left -= 1
+        return True
+
+    def render_scalar(value):
+        nonlocal elided
+        if isinstance(value, str) and len(value) > max_string_length:
+            elided = True
+            return json.dumps(value[:max_string_length], ensure_ascii=False) + \
+                " ... (%s)" % _format_count(len(value) - max_string_length, "more character")
+        return json.dumps(value, ensure_ascii=False)
+
+    def render(value, indent, depth):
+        nonlocal elided
+        if isinstance(value, dict):
+            if not value:
+                return "{}"
+            # the closing brace line is taken before the content
+            if depth > max_depth or not take_line():
+                elided = True
+                return "{... %s}" % _format_count(len(value), "key")
+            inner_indent = indent + "    "
+            lines = []
+            for key, item in itertools.islice(value.items(), max_keys):
+                if not take_line():
+                    break
+                lines.append(
+                    f"{inner_indent}{json.dumps(key, ensure_ascii=False)}: {render(item, inner_indent, depth + 1)}"
+                )
+            if len(value) > len(lines):
+                elided = True
+                lines.append(f"{inner_indent}... {_format_count(len(value) - len(lines), 'more key')}")
+            return "{\n" + ",\n".join(lines) + "\n" + indent + "}"
+        elif isinstance(value, list):
+            if not value:
+                return "[]"
+            if depth > max_depth or not take_line():
+                elided = True
+                return "[... %s]" % _format_count(len(value), "item")
+            inner_indent = indent + "    "
+            lines = []
+            for item in itertools.islice(value, max_items):
+                if not take_line():
+                    break
+                lines.append(inner_indent + render(item, inner_indent, depth + 1))
+            if len(value) > len(lines):
+                elided = True
+                lines.append(f"{inner_indent}... {_format_count(len(value) - len(lines), 'more item')}")
+            return "[\n" + ",\n".join(lines) + "\n" + indent + "]"
+        else:
+            return render_scalar(value)
+
+    preview = render(data, "", 1)
+    if lines_left <= 0 and elided:
+        preview += f"\n(preview limited to {_format_count(max_lines, 'line')})"
+    return preview, elided
+
+
+class _JsonObjectScanner:
+    # an incremental scanner of a JSON object (fed with chunks of UTF-8 bytes) that decodes only the values of
+    # the requested top-level keys and stops as soon as they have all been found; the other values are skipped
+    # by decoding their direct children one at a time (with the C scanner of the json module), the text already
+    # scanned being dropped as new chunks are read
+    _WHITESPACES = re.compile(r"[ \t\n\r]*")
+    _scan_once = json.JSONDecoder().scan_once
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._eof = False
+        self._buffer = ""
+        self._pos = 0
+
+    def _fill(self, min_size=1) -> bool:
+        # read at least min_size more characters (unless the end of the document is reached)
+        new = []
+        size = 0
+        while size < min_size and not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._decoder.decode(b"", final=True)
+            else:
+                text = self._decoder.decode(chunk)
+            new.append(text)
+            size += len(text)
+        if not size:
+            return False
+        self._buffer = self._buffer[self._pos:] + "".join(new)
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self._pos = self._WHITESPACES.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f"Invalid JSON document: expecting '{char}'")
+        self._pos += 1
+
+    def _scan_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._scan_once(self._buffer, self._pos)
+            except (StopIteration, ValueError):
+                end = None
+            # a number reaching the end of the buffer (or followed by a partial fraction/exponent) may continue
+            # in the next chunk
+            if end is not None and (self._eof or (end < len(self._buffer) and self._buffer[end] not in ".eE+-")):
+                break
+            # the value is incomplete: the buffered text is doubled so that a large value is not scanned too many times
+            if not self._fill(len(self._buffer) - self._pos):
+                if end is not None:
+                    break
+                raise ValueError("Invalid JSON document")
+        self._pos = end
+        return value
+
+    def _read_value(self, keep=True):
+        # an array or an object is read child by child (so that only one child at a time is held in memory
+        # when it is skipped), the children are entirely scanned by the C scanner
+        opening = self._peek()
+        if opening not in ("[", "{"):
+            return self._scan_value()
+
+        container = [] if opening == "[" else {}
+        closing = "]" if opening == "[" else "}"
+        self._pos += 1
+        if self._peek() == closing:
+            self._pos += 1
+            return container
+        while True:
+            if opening == "{":
+                key = self._scan_value()
+                self._expect(":")
+                value = self._scan_value()
+                if keep:
+                    container[key] = value
+            else:
+                value = self._scan_value()
+                if keep:
+                    container.append(value)
+            if self._peek() != ",":
+                self._expect(closing)
+                return container
+            self._pos += 1
+
+    def read_items(self, keys: Iterable[str]) -> dict:
+        keys = set(keys)
+        items = {}
+        self._expect("{")
+        if self._peek() == "}":
+            return items
+        while keys:
+            if self._peek() != '"':
+                raise ValueError("Invalid JSON document: expecting a key")
+            key = self._scan_value()
+            self._expect(":")
+            if key in keys:
+                items[key] = self._read_value()
+                keys.discard(key)
+            else:
+                self._read_value(keep=False)
+            if self._peek() != ",":
+                self._expect("}")
+                break
+            self._pos += 1
+        return items
+
+
+class JsonBackend:
+    """
+    The JSON backend used to decode response bodies and to pretty-print JSON data in the logs.
+
+    This class implements the backend with the standard :py:mod:`json` module. It can be subclassed
+    and passed to :py:func:`set_json_backend`.
+
+    .. versionadded:: 0.5.0
+    """
+    #: The backend name.
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decode the JSON document ``data``, it raises a :py:class:`ValueError` if it is not valid JSON.
+        """
+        return json.loads(data)
+
+    def dumps(self, data: Any) -> str:
+        """
+        Serialize ``data`` as pretty-printed JSON (with an indentation of 4 spaces and non-ASCII characters
+        left as is).
+        """
+        return json.dumps(data, indent=4, ensure_ascii=False)
+
+    def dump(self, data: Any, fh: io.RawIOBase):
+        """
+        Serialize ``data`` as pretty-printed UTF-8 JSON into the binary file object ``fh``.
+        """
+        with io.TextIOWrapper(fh, encoding="utf-8") as text_fh:
+            json.dump(data, text_fh, indent=4, ensure_ascii=False)
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    A JSON backend based on `orjson <https://github.com/ijl/orjson>`_ (which must be installed).
+
+    The pretty-printed JSON is the same as the one produced by :py:class:`JsonBackend`. The data that cannot be
+    handled by orjson (integers greater than 64 bits, non-string keys, ``NaN`` and infinite numbers, etc...) are
+    delegated to :py:class:`JsonBackend`.
+
+    .. versionadded:: 0.5.0
+    """
+    name = "orjson"
+
+    # orjson writes exponents differently (1e16 instead of 1e+16), the regexp starts with a literal to be
+    # as fast as possible, the line part before the exponent is then checked to be an actual number
+    _EXPONENT_REGEXP = re.compile(rb"e(-?)(\d+)(,?)(?=\n|\Z)")
+    _MANTISSA_REGEXP = re.compile(rb'(?: *|.*": )-?\d+(?:\.\d+)?')
+    # orjson also writes the numbers in [1e-5, 1e-4) without exponent (0.00001 instead of 1e-05)
+    _SMALL_NUMBER_REGEXP = re.compile(rb"0\.0000([1-9]\d*)(,?)(?=\n|\Z)")
+    _VALUE_PREFIX_REGEXP = re.compile(rb'(?: *|.*": )-?')
+
+    @staticmethod
+    def _reindent(dumped: bytes) -> bytes:
+        # orjson only supports 2 spaces indentation: replace level by level (using \x01, which cannot appear
+        # unescaped in JSON, as a placeholder) the leading spaces, this is much faster than a regexp
+        level = 1
+        while True:
+            indent = b"\n" + b"\x01" * (level - 1) + b"  "
+            if indent not in dumped:
+                return dumped.replace(b"\x01", b"    ")
+            dumped = dumped.replace(indent, b"\n" + b"\x01" * level)
+            level += 1
+
+    @classmethod
+    def _fix_exponent(cls, match) -> bytes:
+        line_start = match.string.rfind(b"\n", 0, match.start()) + 1
+        if not cls._MANTISSA_REGEXP.fullmatch(match.string, line_start, match.start()):
+            return match.group(0)
+        sign, exponent, comma = match.groups()
+        return b"e%s%s%s" % (sign or b"+", exponent.zfill(2), comma)
+
+    @classmethod
+    def _fix_small_number(cls, match) -> bytes:
+        line_start = match.string.rfind(b"\n", 0, match.start()) + 1
+        if not cls._VALUE_PREFIX_REGEXP.fullmatch(match.string, line_start, match.start()):
+            return match.group(0)
+        digits, comma = match.groups()
+        mantissa = digits[:1] + b"." + digits[1:] if len(digits) > 1 else digits
+        return b"%se-05%s" % (mantissa, comma)
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonBackend requires orjson, install it with: pip install orjson")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return super().loads(data)
+
+    @staticmethod
+    def _has_non_finite_number(data) -> bool:
+        stack = [data]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, float):
+                if not math.isfinite(value):
+                    return True
+            elif isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, (list, tuple)):
+                stack.extend(value)
+        return False
+
+    def dumps(self, data: Any) -> str:
+        try:
+            dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            return super().dumps(data)
+        # orjson writes NaN and infinite numbers as null (the data only has to be scanned if null is written)
+        if b"null" in dumped and self._has_non_finite_number(data):
+            return super().dumps(data)
+        dumped = self._EXPONENT_REGEXP.sub(self._fix_exponent, self._reindent(dumped))
+        if b"0.0000" in dumped:
+            dumped = self._SMALL_NUMBER_REGEXP.sub(self._fix_small_number, dumped)
+        return dumped.decode("utf-8")
+
+    def dump(self, data: Any, fh: io.RawIOBase):
+        fh.write(self.dumps(data).encode("utf-8"))
+
+
+_json_backend = JsonBackend()
+
+
+def set_json_backend(backend: Union[str, JsonBackend]):
+    """
+    Set the JSON backend used to decode response bodies (:py:meth:`Response.json`) and to pretty-print
+    JSON data in the logs.
+
+    ``backend`` can be either a :py:class:`JsonBackend` instance or one of the following values:
+
+    - ``"json"``: the standard :py:mod:`json` module (default)
+    - ``"orjson"``: `orjson <https://github.com/ijl/orjson>`_ (it must be installed)
+    - ``"auto"``: orjson if installed, the standard :py:mod:`json` module otherwise
+
+    .. versionadded:: 0.5.0
+    """
+    global _json_backend
+
+    if isinstance(backend, JsonBackend):
+        _json_backend = backend
+    elif backend == "json" or (backend == "auto" and orjson is None):
+        _json_backend = JsonBackend()
+    elif backend in ("orjson", "auto"):
+        _json_backend = OrjsonBackend()
+    else:
+        raise ValueError(f"Unknown JSON backend '{backend}'")
+
+
+def get_json_backend() -> JsonBackend:
+    """
+    Get the JSON backend currently in use.
+
+    .. versionadded:: 0.5.0
+    """
+    return _json_backend
+
+
+class InteractionNotRecorded(LemoncheesecakeRequestsException):
+    """
+    This exception is raised when a request is performed by a session replaying a :py:class:`Cassette`
+    in which this request has not been recorded.
+
+    .. versionadded:: 0.5.0
+    """
+    pass
+
+
+# the maximum number of tests (report locations) for which a per-test state (deferred requests/responses, cumulative
+# response time) is kept at once, the least recently used are evicted
+_MAX_TRACKED_LOCATIONS = 256
+
+
 class Logger:
     """
     The Logger class.
@@ -65,7 +683,12 @@ class Logger:
                  request_line_logging=True, request_headers_logging=True, request_body_logging=True,
                  response_code_logging=True, response_headers_logging=True, response_body_logging=True,
                  debug=False,
-                 max_inlined_body_size=2048):
+                 max_inlined_body_size=2048,
+                 streamed_body_preview_size=2048, streamed_body_attachment=False,
+                 deferred_logging=False, deferred_buffer_size=50,
+                 timings_logging=False, background_logging=False,
+                 json_preview=False, json_preview_max_items=10, json_preview_max_keys=20, json_preview_max_depth=5,
+                 json_preview_max_string_length=256, json_preview_max_lines=200, json_preview_attachment=False):
         #: Whether or not the request line must be logged.
         self.request_line_logging: bool = request_line_logging
         #: Whether or not the request headers must be logged.
@@ -80,10 +703,58 @@ class Logger:
         self.response_body_logging: bool = response_body_logging
         #: Whether or not the logger should log as debug instead of info
         self.debug: bool = debug
-        #: If a serialized request/response body size is greater than ``max_inlined_body_size`` then it will
-        #: be logged as an attachment. If it is set to ``None``, the body will be logged directly
-        #: whatever his size.
+        #: If a request/response body size (in bytes, before any serialization) is greater than
+        #: ``max_inlined_body_size`` then it will be logged as an attachment. If it is set to ``None``, the body
+        #: will be logged directly whatever his size.
         self.max_inlined_body_size: Optional[int] = max_inlined_body_size
+        #: When a response is streamed (``stream=True``), its body is not read by the logger, instead a preview
+        #: of (at most) ``streamed_body_preview_size`` bytes is captured while the caller consumes the body
+        #: and is logged once the body has been consumed or the response is closed.
+        self.streamed_body_preview_size: int = streamed_body_preview_size
+        #: Whether or not the full body of a streamed response must be written (incrementally, as the caller
+        #: consumes it) to an attachment.
+        self.streamed_body_attachment: bool = streamed_body_attachment
+        #: Whether or not the logging of the request/response details is deferred: if enabled, only a one-line summary
+        #: is logged for each request/response and the details of the last ``deferred_buffer_size`` requests/responses
+        #: of the current test are logged only if one of the :py:class:`Response` checking methods fails,
+        #: if :py:meth:`flush` is called or if the test is already failed.
+        self.deferred_logging: bool = deferred_logging
+        #: The maximum number of requests/responses kept for deferred logging (per test).
+        self.deferred_buffer_size: int = deferred_buffer_size
+        #: Whether or not the per-phase timings of the response (see :py:attr:`Response.timings`) must be logged
+        #: along with the response status.
+        self.timings_logging: bool = timings_logging
+        #: Whether or not the requests/responses performed within a :py:meth:`background_scope` block are formatted
+        #: by a background thread: the logs are still written in order to the report by the test thread, as soon as
+        #: they are ready and at the latest when the response is checked or when the block exits (the
+        #: requests/responses performed outside of such a block are formatted in place).
+        self.background_logging: bool = background_logging
+        #: Whether or not a JSON response body is logged as a bounded structural preview: at most
+        #: ``json_preview_max_items`` array items and ``json_preview_max_keys`` object keys are shown per level,
+        #: containers nested deeper than ``json_preview_max_depth`` levels are collapsed and strings are cut after
+        #: ``json_preview_max_string_length`` characters, the number of elided items/keys/characters being shown;
+        #: the whole preview is cut after ``json_preview_max_lines`` lines. The preview also applies to the body shown
+        #: in the :py:class:`StatusCodeMismatch` error message. Note that the JSON body is still fully decoded to build
+        #: the preview, only its formatting is bounded.
+        self.json_preview: bool = json_preview
+        #: The maximum number of array items shown per array in a JSON preview.
+        self.json_preview_max_items: int = json_preview_max_items
+        #: The maximum number of keys shown per object in a JSON preview.
+        self.json_preview_max_keys: int = json_preview_max_keys
+        #: The maximum depth of the containers shown in a JSON preview.
+        self.json_preview_max_depth: int = json_preview_max_depth
+        #: The maximum number of characters shown per string in a JSON preview.
+        self.json_preview_max_string_length: int = json_preview_max_string_length
+        #: The maximum number of lines of a JSON preview (the lines reporting elided elements are not counted).
+        self.json_preview_max_lines: int = json_preview_max_lines
+        #: Whether or not the full JSON body must be saved as an attachment when its preview is truncated.
+        self.json_preview_attachment: bool = json_preview_attachment
+        self._background = threading.local()
+        self._deferred_lock = threading.Lock()
+        # the deferred requests/responses per report location (the least recently used locations are evicted)
+        self._deferred_exchanges = collections.OrderedDict()
+        # the report location of the last deferred request/response per test thread
+        self._deferred_locations = collections.OrderedDict()
 
     @classmethod
     def on(cls, debug=False) -> "Logger":
@@ -116,6 +787,26 @@ class Logger:
         """
         return cls(response_body_logging=False, debug=debug)
 
+    @classmethod
+    def deferred(cls, debug=False, buffer_size=50) -> "Logger":
+        """
+        Create a logger with every request/response details enabled but whose logging is deferred
+        (see :py:attr:`deferred_logging`).
+
+        .. versionadded:: 0.5.0
+        """
+        return cls(debug=debug, deferred_logging=True, deferred_buffer_size=buffer_size)
+
+    @classmethod
+    def background(cls, debug=False) -> "Logger":
+        """
+        Create a logger with every request/response details enabled and whose formatting is performed
+        in background within a :py:meth:`background_scope` block (see :py:attr:`background_logging`).
+
+        .. versionadded:: 0.5.0
+        """
+        return cls(debug=debug, background_logging=True)
+
     @staticmethod
     def format_request_line(method: str, url: str, hint: str = None) -> str:
         formatted = "HTTP request"
@@ -126,7 +817,7 @@ class Logger:
 
     @staticmethod
     def _format_json(data):
-        return json.dumps(data, indent=4, ensure_ascii=False)
+        return get_json_backend().dumps(data)
 
     @staticmethod
     def _format_dict(data) -> str:
@@ -188,46 +879,173 @@ class Logger:
         return "\n".join(chunks)
 
     @staticmethod
-    def format_response_line(resp, hint: str = None) -> str:
+    def format_response_line(resp, hint: str = None, with_timings: bool = False) -> str:
         content = "HTTP response"
         if hint:
             content += f" ({hint})"
         content += ":\n"
         content += "  > Status: %d\n" % resp.status_code
         content += "  > Duration: %.03fs" % resp.elapsed.total_seconds()
+        timings = getattr(resp, "timings", None)
+        if timings and timings.wait:
+            content += " (after %.03fs waiting for client-side limits)" % timings.wait
+        if with_timings and timings:
+            content += "\n  > Timings: %s" % timings
+        cache_status = getattr(resp, "cache_status", None)
+        if cache_status:
+            content += "\n  > Cache: %s" % cache_status
+        shared_call = getattr(resp, "shared_call", None)
+        if shared_call:
+            content += "\n  > Shared call: #%d%s" % (shared_call, " (coalesced)" if resp.coalesced else "")
+        return content
+
+    @staticmethod
+    def format_summary_line(resp: requests.Response, hint: str = None) -> str:
+        content = "HTTP request"
+        if hint:
+            content += f" ({hint})"
+        content += ": %s %s => %d (%.03fs)" % (
+            resp.request.method, resp.request.url, resp.status_code, resp.elapsed.total_seconds()
+        )
+        cache_status = getattr(resp, "cache_status", None)
+        if cache_status:
+            content += f" [cache {cache_status}]"
+        return content
+
+    @staticmethod
+    def format_retry_line(attempt: "Attempt", hint: str = None) -> str:
+        content = "HTTP request"
+        if hint:
+            content += f" ({hint})"
+        content += f": {attempt}"
+        if attempt.exception is not None:
+            content += f"\n{attempt.exception}"
         return content
 
     @classmethod
     def format_response_headers(cls, headers) -> str:
         return "HTTP response headers:\n%s" % Logger._format_dict(headers)
 
+    @staticmethod
+    def _get_response_body_kind(resp: requests.Response) -> Tuple[str, Any, Optional[str]]:
+        # return the kind of body ("empty", "json", "text" or "binary") along with the decoded JSON for "json"
+        # and the encoding for "text"
+        content = resp.content
+        if not content:
+            return "empty", None, None
+        media_type, charset = _parse_content_type(resp.headers)
+        if _is_binary_content_type(media_type):
+            return "binary", None, None
+        if _may_be_json(resp):
+            try:
+                return "json", resp._json() if isinstance(resp, Response) else resp.json(), None
+            except ValueError:
+                pass
+        encoding = charset
+        if encoding is None and _is_text_content_type(media_type):
+            encoding = resp.encoding
+        if encoding is None:
+            encoding = _sniff_encoding(content)
+        return ("text", None, encoding) if encoding else ("binary", None, None)
+
     @classmethod
     def format_response_body(cls, resp: "Response") -> str:
-        if not resp.content:
+        kind, js, encoding = cls._get_response_body_kind(resp)
+        if kind == "empty":
             return "HTTP response body:\n  > n/a"
-        try:
-            js = resp.json()
-        except ValueError:
-            if resp.apparent_encoding is not None:  # None means that it does not look like text
-                return "HTTP response body:\n" + resp.text
-            else:
-                return "HTTP response body (binary data, displayed as base64):\n" + cls._format_binary(resp.content)
-        else:
+        elif kind == "json":
             return "HTTP response body (application/json):\n" + (cls._format_json(js))
+        elif kind == "text":
+            return "HTTP response body:\n" + str(resp.content, encoding, errors="replace")
+        else:
+            return "HTTP response body (binary data, displayed as base64):\n" + cls._format_binary(resp.content)
+
+    @classmethod
+    def format_streamed_response_body(cls, preview: bytes, size: int, complete: bool, encoding: str = None) -> str:
+        if not size:
+            return "HTTP response body:\n  > %s" % ("n/a" if complete else "<stream not consumed>")
+
+        description = "HTTP response body (streamed, %d bytes%s" % (
+            size, "" if complete else " consumed before the response was closed"
+        )
+        if len(preview) < size:
+            description += ", first %d bytes shown" % len(preview)
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or "utf-8")()
+            return description + "):\n" + decoder.decode(bytes(preview), final=len(preview) == size)
+        except (UnicodeDecodeError, LookupError):
+            return description + ", displayed as base64):\n" + cls._format_binary(bytes(preview))
 
     def _log(self, content):
-        if self.debug:
-            lcc.log_debug(content)
-        else:
-            lcc.log_info(content)
+        _emit(lcc.log_debug if self.debug else lcc.log_info, content)
+
+    def _must_be_attached(self, body_size: int) -> bool:
+        return not self.debug and self.max_inlined_body_size is not None and body_size > self.max_inlined_body_size
 
-    def _log_body(self, formatted_body, description):
-        if not self.debug and self.max_inlined_body_size is not None and len(formatted_body) > self.max_inlined_body_size:
-            lcc.save_attachment_content(formatted_body, "body", description)
+    def _log_body(self, formatted_body, description, body_size=None):
+        if self._must_be_attached(len(formatted_body) if body_size is None else body_size):
+            _emit(lcc.save_attachment_content, formatted_body, "body", description)
         else:
             self._log(formatted_body)
 
-    def log_request(self, request: requests.Request, prepared_request: requests.PreparedRequest, hint: str):
+    def format_json_preview(self, data: Any) -> Tuple[str, bool]:
+        """
+        Format a bounded structural preview of the decoded JSON ``data`` (see :py:attr:`json_preview`),
+        return the preview and whether or not it is truncated.
+
+        .. versionadded:: 0.5.0
+        """
+        return _format_json_preview(
+            data, self.json_preview_max_items, self.json_preview_max_keys, self.json_preview_max_depth,
+            self.json_preview_max_string_length, self.json_preview_max_lines
+        )
+
+    def _format_response_json_preview(self, resp: requests.Response, js) -> Tuple[str, bool]:
+        preview, truncated = self.format_json_preview(js)
+        if not truncated:
+            return "HTTP response body (application/json):\n" + preview, False
+        return "HTTP response body (application/json, %d bytes, truncated):\n%s" % (len(resp.content), preview), True
+
+    def _log_response_json_preview(self, resp: requests.Response, js):
+        formatted_body, truncated = self._format_response_json_preview(resp, js)
+        self._log(formatted_body)
+        if truncated and self.json_preview_attachment:
+            def write(fh):
+                get_json_backend().dump(js, fh)
+            _save_attachment(_get_body_filename(resp.headers, "json"), "HTTP response body", write)
+
+    def _log_response_body(self, resp: requests.Response):
+        if self.json_preview:
+            kind, js, _ = self._get_response_body_kind(resp)
+            if kind == "json":
+                self._log_response_json_preview(resp, js)
+                return
+
+        # the decision to inline the body or not is made on the raw body size, so that a large body
+        # is never formatted as a string, it is directly written to the attachment file instead
+        if not self._must_be_attached(len(resp.content or b"")):
+            self._log(self.format_response_body(resp))
+            return
+
+        kind, js, encoding = self._get_response_body_kind(resp)
+        content = resp.content
+        if kind == "json":
+            def write(fh):
+                get_json_backend().dump(js, fh)
+        elif kind == "text":
+            def write(fh):
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+                with memoryview(content) as view:
+                    for offset in range(0, len(view), _ATTACHMENT_CHUNK_SIZE):
+                        fh.write(decoder.decode(view[offset:offset + _ATTACHMENT_CHUNK_SIZE]).encode("utf-8"))
+                fh.write(decoder.decode(b"", final=True).encode("utf-8"))
+        else:
+            def write(fh):
+                fh.write(content)
+
+        _save_attachment(_get_body_filename(resp.headers, kind), "HTTP response body", write)
+
+    def _log_request(self, request: requests.Request, prepared_request: requests.PreparedRequest, hint: str):
         if self.request_line_logging:
             self._log(self.format_request_line(request.method, prepared_request.url, hint))
 
@@ -237,17 +1055,480 @@ class Logger:
         if self.request_body_logging:
             formatted_body = self.format_request_body(request, prepared_request)
             if formatted_body:
-                self._log_body(formatted_body, "HTTP request body")
+                if not request.files and isinstance(prepared_request.body, (str, bytes)):
+                    body_size = len(prepared_request.body)
+                else:
+                    body_size = None
+                self._log_body(formatted_body, "HTTP request body", body_size)
 
-    def log_response(self, resp: requests.Response, hint: str):
+    def _log_response(self, resp: requests.Response, hint: str, record_stream=True):
         if self.response_code_logging:
-            self._log(self.format_response_line(resp, hint))
+            self._log(self.format_response_line(resp, hint, self.timings_logging))
 
         if self.response_headers_logging:
             self._log(self.format_response_headers(resp.headers))
 
         if self.response_body_logging:
-            self._log_body(self.format_response_body(resp), "HTTP response body")
+            if getattr(resp, "cache_status", None):
+                # the body has already been logged when the response has been cached
+                self._log("HTTP response body: served from cache (%d bytes)" % len(resp.content))
+            elif getattr(resp, "coalesced", False):
+                # the body is logged along with the response of the shared call
+                self._log("HTTP response body: see shared call #%d (%d bytes)" % (resp.shared_call, len(resp.content)))
+            elif resp._content is False:
+                # the response is streamed, the body will be logged as the caller consumes it
+                if record_stream and isinstance(resp, Response):
+                    resp._body_recorder = _StreamedBodyRecorder(self, resp)
+                else:
+                    self._log(self.format_streamed_response_body(b"", 0, complete=False))
+            else:
+                self._log_response_body(resp)
+
+    def _defer(self, resp: requests.Response, hint: str):
+        location, thread = _get_caller()
+        with self._deferred_lock:
+            # the tests of a given thread run one after the other: once the thread has moved on to another test,
+            # the exchanges of its previous test (that has passed since they have not been flushed) are released
+            previous_location = self._deferred_locations.get(thread, location)
+            if previous_location != location:
+                self._deferred_exchanges.pop(previous_location, None)
+            self._deferred_locations[thread] = location
+            self._deferred_locations.move_to_end(thread)
+            while len(self._deferred_locations) > _MAX_TRACKED_LOCATIONS:
+                self._deferred_locations.popitem(last=False)
+            exchanges = self._deferred_exchanges.get(location)
+            if exchanges is None:
+                exchanges = self._deferred_exchanges[location] = collections.deque(maxlen=self.deferred_buffer_size)
+                while len(self._deferred_exchanges) > _MAX_TRACKED_LOCATIONS:
+                    self._deferred_exchanges.popitem(last=False)
+            else:
+                self._deferred_exchanges.move_to_end(location)
+            exchanges.append((resp, hint))
+
+        if _is_report_location_failed(location):
+            self.flush()
+        else:
+            self._log(self.format_summary_line(resp, hint))
+
+    def flush(self):
+        """
+        Log the details of the requests/responses whose logging has been deferred
+        (see :py:attr:`deferred_logging`) in the current test.
+
+        The requests/responses being formatted in background (see :py:attr:`background_logging`) by the current
+        thread are also waited for and logged.
+
+        .. versionadded:: 0.5.0
+        """
+        self._drain_background(block=True)
+
+        with self._deferred_lock:
+            exchanges = self._deferred_exchanges.pop(_get_report_location(), ())
+
+        for resp, hint in exchanges:
+            request = getattr(resp, "orig_request", None) or requests.Request(resp.request.method, resp.request.url)
+            self._log_request(request, resp.request, hint)
+            self._log_response(resp, hint, record_stream=False)
+
+    @contextlib.contextmanager
+    def background_scope(self):
+        """
+        A context manager within which the requests/responses performed by the current thread are formatted in
+        background (see :py:attr:`background_logging`); its exit waits for the logs still pending and writes them,
+        it is meant to wrap the whole test (typically through a test-scoped fixture)::
+
+            @lcc.fixture(scope="test")
+            def api():
+                session = Session(base_url="https://api.example.com", logger=Logger.background())
+                with session.logger.background_scope():
+                    yield session
+
+        .. versionadded:: 0.5.0
+        """
+        scopes = getattr(self._background, "scopes", None)
+        if scopes is None:
+            scopes = self._background.scopes = []
+        scopes.append(_get_report_location())
+        try:
+            yield self
+        finally:
+            try:
+                self._drain_background(block=True)
+            finally:
+                scopes.pop()
+
+    def _in_background_scope(self) -> bool:
+        scopes = getattr(self._background, "scopes", None)
+        return bool(scopes) and scopes[-1] == _get_report_location()
+
+    def _drain_background(self, block: bool):
+        # write to the report (in the test thread, to keep the logs in order and attached to the right step)
+        # the logs formatted in background, stop at the first job still in progress unless block is set
+        jobs = getattr(self._background, "jobs", None)
+        while jobs:
+            job = jobs[0]
+            if not job.done.wait(None if block else 0):
+                return
+            jobs.popleft()
+            _flush(job.ops)
+
+    def _dispatch(self, func, *args):
+        if not self.background_logging or _log_buffer.get() is not None or not self._in_background_scope():
+            # the logs are already buffered by the caller (concurrent requests, retries): they are formatted
+            # in place not to change their order within the buffer; outside of a background scope, nothing
+            # guarantees that the logs would be written before the end of the test
+            self._drain_background(block=True)
+            func(*args)
+            return
+
+        if not hasattr(self._background, "jobs"):
+            self._background.jobs = collections.deque()
+        self._drain_background(block=False)
+        job = _LoggingJob(func, args)
+        self._background.jobs.append(job)
+        _background_worker.submit(job)
+
+    def log_retry(self, attempt: "Attempt", hint: str):
+        """
+        Log an attempt that is about to be retried (see :py:class:`RetryPolicy`).
+
+        .. versionadded:: 0.5.0
+        """
+        if self.response_code_logging:
+            self._dispatch(self._log, self.format_retry_line(attempt, hint))
+
+    def log_request(self, request: requests.Request, prepared_request: requests.PreparedRequest, hint: str):
+        if self.deferred_logging:
+            # the request will be handled along with its response
+            return
+        # the prepared request is copied as it may still be modified by the hooks or the redirections
+        self._dispatch(self._log_request, request, prepared_request.copy(), hint)
+
+    def log_response(self, resp: requests.Response, hint: str):
+        if self.deferred_logging:
+            self._defer(resp, hint)
+        elif resp._content is False:
+            # a streamed response body is logged as the caller consumes it, in the test thread
+            self._drain_background(block=True)
+            self._log_response(resp, hint)
+        else:
+            self._dispatch(self._log_response, resp, hint)
+
+
+class _LoggingJob:
+    __slots__ = ("func", "args", "ops", "done")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.ops = []
+        self.done = threading.Event()
+
+    def run(self):
+        # the logging operations are buffered, they are performed by the test thread
+        token = _log_buffer.set(self.ops)
+        try:
+            self.func(*self.args)
+        except Exception as e:
+            self.ops.append((lcc.log_warning, (f"Cannot log HTTP exchange: {e}",)))
+        finally:
+            _log_buffer.reset(token)
+            self.done.set()
+
+
+class _BackgroundWorker:
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, job: _LoggingJob):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="lemoncheesecake-requests-logging", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(job)
+
+    def _run(self):
+        while True:
+            self._queue.get().run()
+
+
+_background_worker = _BackgroundWorker()
+
+
+class _StreamedBodyRecorder:
+    def __init__(self, logger: Logger, resp: requests.Response):
+        self.logger = logger
+        self.resp = resp
+        self.preview = bytearray()
+        self.size = 0
+        self.complete = False
+        self.done = False
+        self._attachment = None
+
+    def record(self, chunk: bytes):
+        if self.done:
+            return
+        self.size += len(chunk)
+        missing = self.logger.streamed_body_preview_size - len(self.preview)
+        if missing > 0:
+            self.preview += chunk[:missing]
+        if self.logger.streamed_body_attachment:
+            if self._attachment is None:
+                attachment = lcc.prepare_attachment(_get_body_filename(self.resp.headers), "HTTP response body")
+                self._attachment = attachment, open(attachment.__enter__(), "wb")
+            self._attachment[1].write(chunk)
+
+    def finalize(self):
+        if self.done:
+            return
+        self.done = True
+        self.logger._log(
+            self.logger.format_streamed_response_body(self.preview, self.size, self.complete, self.resp.encoding)
+        )
+        if self._attachment:
+            attachment, fh = self._attachment
+            fh.close()
+            attachment.__exit__(None, None, None)
+
+
+class Timings:
+    """
+    The per-phase timings (in seconds) of an HTTP request, as available through :py:attr:`Response.timings`.
+
+    A phase that did not occur (for instance, the DNS resolution and the TCP connection when a connection is
+    reused from the pool, or the TLS handshake for a plain HTTP request) is ``None``. The DNS resolution is only
+    measured separately if the session has been created with ``dns_timings=True``, it is otherwise part of
+    the connection duration.
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self):
+        #: The DNS resolution duration (see ``Session(dns_timings=True)``).
+        self.dns: Optional[float] = None
+        #: The TCP connection duration (including the DNS resolution, unless it is measured separately).
+        self.connect: Optional[float] = None
+        #: The TLS handshake duration.
+        self.tls: Optional[float] = None
+        #: The duration between the start of the request sending (after connection setup) and the reception of
+        #: the response headers.
+        self.ttfb: Optional[float] = None
+        #: The response body transfer duration (``None`` for streamed responses).
+        self.transfer: Optional[float] = None
+        #: Whether or not the request has been sent using a connection reused from the pool.
+        self.connection_reused: Optional[bool] = None
+        #: The time spent waiting for the client-side limits of the session (see :py:class:`RateLimit`),
+        #: ``None`` if no limit applies to the request; it is not included in :py:attr:`Response.elapsed`.
+        self.wait: Optional[float] = None
+        self._headers_received_at = None
+        self._wait_excluded = False
+        self._measure_dns = False
+
+    def __str__(self):
+        phases = ", ".join(
+            "%s %.03fs" % (name, value) for name, value in (
+                ("wait", self.wait), ("DNS", self.dns), ("connect", self.connect), ("TLS", self.tls),
+                ("TTFB", self.ttfb), ("transfer", self.transfer)
+            ) if value is not None
+        )
+        return "%s (%s connection)" % (phases, "reused" if self.connection_reused else "new")
+
+
+_current_timings: "contextvars.ContextVar[Optional[Timings]]" = contextvars.ContextVar(
+    "lemoncheesecake_requests_current_timings", default=None
+)
+
+
+class RateLimit:
+    """
+    A client-side limit of the requests sent to a host or URL prefix by one or more sessions
+    (see the ``limits`` argument of :py:class:`Session`).
+
+    ``rate`` is the maximum number of requests per second (enforced through a token bucket allowing bursts of
+    ``burst`` requests) and ``max_in_flight`` the maximum number of concurrent requests (a request being in-flight
+    until its response headers have been received). Requests exceeding these limits wait for their turn.
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self, rate: float = None, burst: int = 1, max_in_flight: int = None):
+        #: The maximum number of requests per second.
+        self.rate: Optional[float] = rate
+        #: The maximum number of requests that can be sent at once (within the rate limit).
+        self.burst: int = burst
+        #: The maximum number of concurrent requests.
+        self.max_in_flight: Optional[int] = max_in_flight
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = time.perf_counter()
+        self._semaphore = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def _reserve(self) -> float:
+        # take a token (the number of tokens can become negative, meaning that tokens are reserved for
+        # the requests already waiting) and return the delay before the token becomes available
+        with self._lock:
+            now = time.perf_counter()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated_at) * self.rate) - 1
+            self._updated_at = now
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """
+        Wait until a request can be sent and return the time spent waiting (in seconds).
+        """
+        start = time.perf_counter()
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        if self.rate:
+            delay = self._reserve()
+            if delay > 0:
+                time.sleep(delay)
+        return time.perf_counter() - start
+
+    def release(self):
+        """
+        Notify that a request previously allowed by :py:meth:`acquire` is no longer in-flight.
+        """
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+def _find_rate_limit(limits: dict, url: str) -> Optional[RateLimit]:
+    # like the session adapters, the most specific (the longest) matching URL prefix or host wins
+    host = None
+    found_key, found_limit = "", None
+    for key, limit in limits.items():
+        if "://" in key:
+            matches = url.startswith(key)
+        else:
+            if host is None:
+                host = urllib.parse.urlsplit(url).netloc
+            matches = key == host or key == host.rsplit(":", 1)[0]
+        if matches and len(key) > len(found_key):
+            found_key, found_limit = key, limit
+    return found_limit
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        timings = _current_timings.get()
+        if timings is None:
+            return super()._new_conn()
+
+        start = time.perf_counter()
+        if not timings._measure_dns:
+            # the connection is set up by urllib3 as usual, the DNS resolution is part of the connection duration
+            sock = super()._new_conn()
+            timings.connect = time.perf_counter() - start
+            return sock
+
+        try:
+            addresses = socket.getaddrinfo(
+                self._dns_host.strip("[]"), self.port, urllib3.util.connection.allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except OSError:
+            # let urllib3 deal with the error
+            return super()._new_conn()
+        if not addresses:
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timings.dns = resolved - start
+
+        # connect to the addresses we just resolved (in turn, like urllib3 does, until one of them succeeds) so that
+        # the host is not resolved again, host is only substituted while connecting, it is still used for TLS
+        # & headers afterwards
+        host = self._dns_host
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address[4][0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError):
+                    pass
+            else:
+                self._dns_host = addresses[-1][4][0]
+                sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        timings.connect = time.perf_counter() - resolved
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, urllib3.connection.HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        timings = _current_timings.get()
+        if timings is not None and timings.connect is not None:
+            timings.tls = time.perf_counter() - start - timings.connect - (timings.dns or 0.0)
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _HTTPAdapter(requests.adapters.HTTPAdapter):
+    # the transport adapter mounted by Session, it collects the per-phase timings of each request
+    # and counts the requests sent over a pooled connection (hits) or a new connection (misses)
+    __attrs__ = requests.adapters.HTTPAdapter.__attrs__ + ["pool_hits", "pool_misses", "dns_timings"]
+
+    def __init__(self, *args, limits=None, dns_timings=False, **kwargs):
+        self._counters_lock = threading.Lock()
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.limits = limits
+        self.dns_timings = dns_timings
+        super().__init__(*args, **kwargs)
+
+    def __setstate__(self, state):
+        self._counters_lock = threading.Lock()
+        self.limits = None
+        self.dns_timings = False
+        super().__setstate__(state)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        timings = Timings()
+        timings._measure_dns = self.dns_timings
+        limit = _find_rate_limit(self.limits, request.url) if self.limits else None
+        if limit is not None:
+            timings.wait = limit.acquire()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            resp = super().send(request, **kwargs)
+        finally:
+            _current_timings.reset(token)
+            if limit is not None:
+                limit.release()
+        timings._headers_received_at = time.perf_counter()
+        timings.connection_reused = timings.connect is None
+        with self._counters_lock:
+            if timings.connection_reused:
+                self.pool_hits += 1
+            else:
+                self.pool_misses += 1
+        timings.ttfb = timings._headers_received_at - start - sum(
+            value for value in (timings.dns, timings.connect, timings.tls) if value is not None
+        )
+        resp.timings = timings
+        return resp
 
 
 class Response(requests.Response):
@@ -263,51 +1544,184 @@ class Response(requests.Response):
         # `orig_request`
         super().__init__()
         self.orig_request = requests.Request()
+        #: The per-phase timings of the request, ``None`` if they are not available.
+        self.timings: Optional[Timings] = None
+        #: The attempts of the request when performed with a :py:class:`RetryPolicy`, the last one being this response.
+        self.attempts: List[Attempt] = []
+        #: ``"hit"`` if the response has been served from the :py:class:`HttpCache` of the session,
+        #: ``"revalidated"`` if it has been served from the cache after a conditional request, ``None`` otherwise.
+        self.cache_status: Optional[str] = None
+        #: The ID of the HTTP call shared by concurrent identical requests (see :py:attr:`Session.single_flight`)
+        #: that provided this response, ``None`` if the call has not been shared.
+        self.shared_call: Optional[int] = None
+        #: Whether or not this response is a copy of the response of a shared call performed on behalf of
+        #: another request.
+        self.coalesced: bool = False
+        self._logger = None
+        self._json_cache = None
+        self._body_recorder = None
 
     @classmethod
     def cast(cls, resp: requests.Response, orig_request: requests.Request) -> "Response":
         resp.__class__ = cls
         resp.orig_request = orig_request
+        if not hasattr(resp, "timings"):
+            resp.timings = None
+        resp.attempts = []
+        if not hasattr(resp, "cache_status"):
+            resp.cache_status = None
+        if not hasattr(resp, "shared_call"):
+            resp.shared_call = None
+        if not hasattr(resp, "coalesced"):
+            resp.coalesced = False
+        resp._logger = None
+        resp._json_cache = None
+        resp._body_recorder = None
         return resp
 
+    @property
+    def from_cache(self) -> bool:
+        """
+        Whether or not the response has been served from the :py:class:`HttpCache` of the session.
+
+        .. versionadded:: 0.5.0
+        """
+        return self.cache_status is not None
+
+    @staticmethod
+    def _iter_recorded_content(chunks, recorder: _StreamedBodyRecorder):
+        try:
+            for chunk in chunks:
+                recorder.record(chunk)
+                yield chunk
+            recorder.complete = True
+        finally:
+            recorder.finalize()
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        if self._body_recorder is None or self._body_recorder.done:
+            return super().iter_content(chunk_size, decode_unicode)
+
+        chunks = self._iter_recorded_content(super().iter_content(chunk_size), self._body_recorder)
+        if decode_unicode:
+            chunks = requests.utils.stream_decode_response_unicode(chunks, self)
+        return chunks
+
+    def close(self):
+        if self._body_recorder is not None:
+            self._body_recorder.finalize()
+        super().close()
+
+    def _decode_json(self):
+        backend = get_json_backend()
+        if type(backend) is JsonBackend:
+            return super().json()
+
+        if self.encoding is None or codecs.lookup(self.encoding).name == "utf-8":
+            data = self.content
+        else:
+            data = self.text
+        try:
+            return backend.loads(data)
+        except ValueError:
+            # let requests deal with what the backend does not support (BOM, non-standard values, etc...)
+            # and raise the appropriate exception if the body is actually not JSON
+            return super().json()
+
+    def _json(self):
+        # the decoded JSON (or the decoding error) is memoized, so that the body is decoded only once whatever
+        # the number of times it is needed (the logger, *_json checking methods, etc...), the memoized value is
+        # invalidated whenever the response content or encoding changes; it must not be modified in place
+        content, encoding = self.content, self.encoding
+        if self._json_cache is None or self._json_cache[0] is not content or self._json_cache[1] != encoding:
+            try:
+                self._json_cache = content, encoding, self._decode_json(), None
+            except ValueError as e:
+                self._json_cache = content, encoding, None, e
+
+        _, _, data, error = self._json_cache
+        if error is not None:
+            raise error.with_traceback(None)
+        return data
+
+    def json(self, **kwargs):
+        """
+        Decode the response body as JSON.
+
+        A new object is returned on each call (it can then be freely modified), the logger and the ``*_json``
+        checking methods rely on their own decoding of the body, which is performed only once per response.
+
+        The JSON body is decoded using the backend set through :py:func:`set_json_backend`, unless
+        extra arguments are passed.
+
+        .. versionadded:: 0.5.0
+        """
+        if kwargs:
+            return super().json(**kwargs)
+
+        if self._json_cache is not None and self._json_cache[0] is self.content \
+                and self._json_cache[1] == self.encoding and self._json_cache[3] is not None:
+            # the body is already known not to be JSON
+            raise self._json_cache[3].with_traceback(None)
+        return self._decode_json()
+
+    def _flush_deferred_logs(self):
+        if self._logger is not None:
+            if self._logger.deferred_logging:
+                self._logger.flush()
+            else:
+                self._logger._drain_background(block=True)
+
+    def _match(self, func, *args):
+        if self._logger is not None:
+            # the check must be logged after the request/response being formatted in background
+            self._logger._drain_background(block=True)
+        try:
+            result = func(*args)
+        except AbortTest:
+            self._flush_deferred_logs()
+            raise
+        if not (all(result) if isinstance(result, list) else result):
+            self._flush_deferred_logs()
+
     def check_status_code(self, expected: Union[Matcher, int]) -> "Response":
         """
         Check the status code using the :py:func:`lemoncheesecake.matching.check_that` function.
         """
-        check_that("HTTP status code", self.status_code, is_(expected))
+        self._match(check_that, "HTTP status code", self.status_code, is_(expected))
         return self
 
     def check_ok(self) -> "Response":
         """
         Check that the status code is 2xx using the :py:func:`lemoncheesecake.matching.check_that` function.
         """
-        return self.check_status_code(is_2xx())
+        return self.check_status_code(_IS_2XX)
 
     def require_status_code(self, expected: Union[Matcher, int]) -> "Response":
         """
         Check the status code using the :py:func:`lemoncheesecake.matching.require_that` function.
         """
-        require_that("HTTP status code", self.status_code, is_(expected))
+        self._match(require_that, "HTTP status code", self.status_code, is_(expected))
         return self
 
     def require_ok(self) -> "Response":
         """
         Check that the status code is 2xx using the :py:func:`lemoncheesecake.matching.require_that` function.
         """
-        return self.require_status_code(is_2xx())
+        return self.require_status_code(_IS_2XX)
 
     def assert_status_code(self, expected: Union[Matcher, int]) -> "Response":
         """
         Check the status code using the :py:func:`lemoncheesecake.matching.assert_that` function.
         """
-        assert_that("HTTP status code", self.status_code, is_(expected))
+        self._match(assert_that, "HTTP status code", self.status_code, is_(expected))
         return self
 
     def assert_ok(self) -> "Response":
         """
         Check that the status code is 2xx using the :py:func:`lemoncheesecake.matching.assert_that` function.
         """
-        return self.assert_status_code(is_2xx())
+        return self.assert_status_code(_IS_2XX)
 
     def raise_unless_status_code(self, expected: Union[Matcher, int]) -> "Response":
         """
@@ -318,6 +1732,7 @@ class Response(requests.Response):
         matcher = is_(expected)
         match_result = matcher.matches(self.status_code)
         if not match_result:
+            self._flush_deferred_logs()
             raise StatusCodeMismatch(self, matcher, match_result)
         return self
 
@@ -327,11 +1742,64 @@ class Response(requests.Response):
 
         :raises: :py:class:`StatusCodeMismatch`
         """
-        return self.raise_unless_status_code(is_2xx())
+        return self.raise_unless_status_code(_IS_2XX)
 
     @staticmethod
-    def _to_matchers(d: dict) -> dict:
-        return {key: is_(value) for key, value in d.items()}
+    def _to_elapsed_matcher(expected: Union[Matcher, float]) -> Matcher:
+        return expected if isinstance(expected, Matcher) else less_than_or_equal_to(expected)
+
+    def check_elapsed(self, expected: Union[Matcher, float]) -> "Response":
+        """
+        Check the response time (in seconds) using the :py:func:`lemoncheesecake.matching.check_that` function,
+        a number means "at most".
+
+        .. versionadded:: 0.5.0
+        """
+        self._match(
+            check_that, "HTTP response time", self.elapsed.total_seconds(), self._to_elapsed_matcher(expected)
+        )
+        return self
+
+    def require_elapsed(self, expected: Union[Matcher, float]) -> "Response":
+        """
+        Check the response time (in seconds) using the :py:func:`lemoncheesecake.matching.require_that` function,
+        a number means "at most".
+
+        .. versionadded:: 0.5.0
+        """
+        self._match(
+            require_that, "HTTP response time", self.elapsed.total_seconds(), self._to_elapsed_matcher(expected)
+        )
+        return self
+
+    def assert_elapsed(self, expected: Union[Matcher, float]) -> "Response":
+        """
+        Check the response time (in seconds) using the :py:func:`lemoncheesecake.matching.assert_that` function,
+        a number means "at most".
+
+        .. versionadded:: 0.5.0
+        """
+        self._match(
+            assert_that, "HTTP response time", self.elapsed.total_seconds(), self._to_elapsed_matcher(expected)
+        )
+        return self
+
+    def raise_unless_faster_than(self, limit: float) -> "Response":
+        """
+        Raise a :py:class:`ResponseTooSlow` exception unless the response time is less than ``limit`` seconds.
+
+        :raises: :py:class:`ResponseTooSlow`
+
+        .. versionadded:: 0.5.0
+        """
+        if not self.elapsed.total_seconds() < limit:
+            self._flush_deferred_logs()
+            raise ResponseTooSlow(self, limit)
+        return self
+
+    @staticmethod
+    def _to_matchers(d: dict) -> dict:
+        return {key: is_(value) for key, value in d.items()}
 
     def check_headers(self, expected: dict) -> "Response":
         """
@@ -339,7 +1807,7 @@ class Response(requests.Response):
 
         .. versionadded:: 0.4.0
         """
-        check_that_in(self.headers, self._to_matchers(expected))
+        self._match(check_that_in, self.headers, self._to_matchers(expected))
         return self
 
     def require_headers(self, expected: dict) -> "Response":
@@ -348,7 +1816,7 @@ class Response(requests.Response):
 
         .. versionadded:: 0.4.0
         """
-        require_that_in(self.headers, self._to_matchers(expected))
+        self._match(require_that_in, self.headers, self._to_matchers(expected))
         return self
 
     def assert_headers(self, expected: dict) -> "Response":
@@ -357,7 +1825,7 @@ class Response(requests.Response):
 
         .. versionadded:: 0.4.0
         """
-        assert_that_in(self.headers, self._to_matchers(expected))
+        self._match(assert_that_in, self.headers, self._to_matchers(expected))
         return self
 
     def check_header(self, name, expected: Union[Matcher, str]) -> "Response":
@@ -384,34 +1852,1230 @@ class Response(requests.Response):
         """
         return self.assert_headers({name: expected})
 
-    def check_json(self, expected: dict) -> "Response":
+    def check(self, expectation: "Expectation") -> "Response":
+        """
+        Check the response against ``expectation`` (like :py:meth:`check_status_code`, :py:meth:`check_headers`
+        and :py:meth:`check_json` do).
+
+        .. versionadded:: 0.5.0
+        """
+        self._match(expectation._apply, self, False, True)
+        return self
+
+    def require(self, expectation: "Expectation") -> "Response":
+        """
+        Check the response against ``expectation`` (like :py:meth:`require_status_code`, :py:meth:`require_headers`
+        and :py:meth:`require_json` do).
+
+        .. versionadded:: 0.5.0
+        """
+        self._match(expectation._apply, self, True, True)
+        return self
+
+    def assert_(self, expectation: "Expectation") -> "Response":
+        """
+        Check the response against ``expectation`` (like :py:meth:`assert_status_code`, :py:meth:`assert_headers`
+        and :py:meth:`assert_json` do).
+
+        .. versionadded:: 0.5.0
+        """
+        self._match(expectation._apply, self, True, False)
+        return self
+
+    def _get_json_items(self, keys: Iterable[str]) -> dict:
+        # decode only the top-level items of the JSON body (an object) whose key is in keys
+        if self._content is False:
+            # a streamed body is scanned as it is read, it is not read any further once the items have been found
+            return _JsonObjectScanner(self.iter_content(_ATTACHMENT_CHUNK_SIZE)).read_items(keys)
+
+        content = self.content
+        if self._json_cache is not None and self._json_cache[0] is content and self._json_cache[1] == self.encoding:
+            # the body has already been decoded
+            return self._json()
+        if self.encoding is not None and codecs.lookup(self.encoding).name != "utf-8":
+            return self._json()
+        encoding = requests.utils.guess_json_utf(content[:4]) if content else "utf-8"
+        if encoding not in ("utf-8", "utf-8-sig"):
+            return self._json()
+        start = len(codecs.BOM_UTF8) if encoding == "utf-8-sig" else 0
+        with memoryview(content) as view:
+            return _JsonObjectScanner(
+                view[offset:offset + _JSON_SCAN_CHUNK_SIZE]
+                for offset in range(start, len(view), _JSON_SCAN_CHUNK_SIZE)
+            ).read_items(keys)
+
+    def _get_json_for(self, expected: dict, incremental: bool):
+        if not incremental:
+            return self._json()
+        return self._get_json_items(key[0] if isinstance(key, tuple) else key for key in expected)
+
+    def check_json(self, expected: dict, incremental: bool = False) -> "Response":
         """
         Check the response JSON using the :py:func:`lemoncheesecake.matching.check_that_in` function.
 
+        If ``incremental`` is set, only the top-level items of the response JSON named in ``expected`` are decoded,
+        the body being scanned until they have all been found (see :ref:`incremental JSON checks
+        <incremental_json_checks>`). Unlike :py:meth:`json`, which keeps the last value of a key duplicated in the
+        JSON object, the first value is then checked.
+
         .. versionadded:: 0.4.0
         """
-        check_that_in(self.json(), expected)
+        self._match(check_that_in, self._get_json_for(expected, incremental), expected)
         return self
 
-    def require_json(self, expected: dict) -> "Response":
+    def require_json(self, expected: dict, incremental: bool = False) -> "Response":
         """
         Check the response JSON using the :py:func:`lemoncheesecake.matching.require_that_in` function.
 
+        See :py:meth:`check_json` about ``incremental``.
+
         .. versionadded:: 0.4.0
         """
-        require_that_in(self.json(), expected)
+        self._match(require_that_in, self._get_json_for(expected, incremental), expected)
         return self
 
-    def assert_json(self, expected: dict) -> "Response":
+    def assert_json(self, expected: dict, incremental: bool = False) -> "Response":
         """
         Check the response JSON using the :py:func:`lemoncheesecake.matching.assert_that_in` function.
 
+        See :py:meth:`check_json` about ``incremental``.
+
         .. versionadded:: 0.4.0
         """
-        assert_that_in(self.json(), expected)
+        self._match(assert_that_in, self._get_json_for(expected, incremental), expected)
         return self
 
 
+class Expectation:
+    """
+    A set of expectations about a response (status code, headers and JSON) to be checked through
+    :py:meth:`Response.check`, :py:meth:`Response.require` or :py:meth:`Response.assert_`::
+
+        item_ok = Expectation(
+            status_code=is_2xx(), headers={"Content-Type": "application/json"}, json={"id": is_integer()}
+        )
+        for item_id in item_ids:
+            session.get(f"/items/{item_id}").check(item_ok)
+
+    The matchers and the check descriptions are built once when the expectation is created, applying it to a response
+    only evaluates the matchers. The checks are logged the same way as with :py:meth:`Response.check_status_code`,
+    :py:meth:`Response.check_headers` and :py:meth:`Response.check_json`.
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self, status_code: Union[Matcher, int] = None, headers: dict = None, json: dict = None):
+        # the (description, actual value getter, matcher) of each check
+        self._checks = []
+        if status_code is not None:
+            matcher = is_(status_code)
+            self._add_check(lambda resp: resp.status_code, matcher, "HTTP status code", matcher)
+        if headers:
+            self._add_entry_checks(lambda resp: resp.headers, Response._to_matchers(headers))
+        if json:
+            self._add_entry_checks(lambda resp: resp._json(), json)
+
+    def _add_check(self, get_actual, matcher, subject, described_matcher):
+        description = described_matcher.build_description(MatcherDescriptionTransformer())
+        self._checks.append((f"Expect {subject} {description}", get_actual, matcher))
+
+    def _add_entry_checks(self, get_actual, expected, path=()):
+        # the same checks as the ones performed by check_that_in() (one per matcher of the possibly nested expected
+        # data, described like "key" -> "subkey" to be ...)
+        if isinstance(expected, (list, tuple)):
+            items = enumerate(expected)
+        elif isinstance(expected, dict):
+            items = expected.items()
+        elif isinstance(expected, Matcher):
+            subject = " -> ".join(json.dumps(key, ensure_ascii=False) for key in path)
+            self._add_check(get_actual, has_entry(path, expected), subject, expected)
+            return
+        else:
+            raise ValueError("argument %r must be either an instance of list, tuple, dict or Matcher" % expected)
+        for key, value in items:
+            self._add_entry_checks(get_actual, value, path + (key,))
+
+    def _apply(self, resp: "Response", stop_on_failure: bool, log_success: bool) -> List[MatchResult]:
+        # check_that_in() behaves like (stop_on_failure=False, log_success=True), require_that_in() like
+        # (True, True) and assert_that_in() like (True, False)
+        results = []
+        for description, get_actual, matcher in self._checks:
+            result = matcher.matches(get_actual(resp))
+            results.append(result)
+            if log_success or not result:
+                details = result.description
+                if details is not None:
+                    details = str(details)
+                    details = details[:1].upper() + details[1:]
+                lcc.log_check(description, result.is_successful, details)
+            if stop_on_failure and not result:
+                raise AbortTest("previous requirement was not fulfilled" if log_success else "assertion error")
+        return results
+
+
+class Cassette:
+    """
+    A cassette of recorded HTTP interactions (a request and its response) to be used by a :py:class:`Session`.
+
+    In ``"record"`` mode, every request performed by the session along with its response are saved in the cassette
+    (the interactions previously recorded in the cassette file are discarded).
+    In ``"replay"`` mode, the responses are served from the cassette without any network I/O; if a given request has
+    been recorded several times, its responses are replayed in the recording order (the last one being replayed
+    again once they have all been replayed).
+
+    The cassette is stored as an (indexed) SQLite database with compressed bodies, lookups do not depend on the
+    number of recorded interactions. A cassette can be used as a context manager, it must be closed once the
+    recording is done to make sure that every interaction has been written to disk::
+
+        with Cassette("cassette.db", "record") as cassette:
+            session = Session(base_url="https://api.github.com", cassette=cassette)
+            ...
+
+    Interactions are identified by their method, URL and body, it means that requests differing only by
+    their headers are considered the same.
+
+    .. versionadded:: 0.5.0
+    """
+    RECORD = "record"
+    REPLAY = "replay"
+
+    _COMMIT_INTERVAL = 100
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f"Invalid cassette mode '{mode}'")
+        #: The cassette file path.
+        self.path: str = path
+        #: The cassette mode, either ``"record"`` or ``"replay"``.
+        self.mode: str = mode
+        self._lock = threading.Lock()
+        self._occurrences = collections.Counter()
+        self._pending = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS interactions ("
+            "key TEXT, occurrence INTEGER, status_code INTEGER, reason TEXT, url TEXT, headers TEXT, body BLOB, "
+            "PRIMARY KEY (key, occurrence))"
+        )
+        if mode == self.RECORD:
+            # a new recording replaces the previous one, otherwise the extra occurrences it recorded would be replayed
+            self._db.execute("DELETE FROM interactions")
+        self._db.commit()
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Close the cassette.
+        """
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    @staticmethod
+    def _get_key(request: requests.PreparedRequest) -> str:
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, bytes):
+            body = b""
+        return hashlib.sha1(b"\0".join((request.method.encode(), request.url.encode(), body))).hexdigest()
+
+    def record(self, request: requests.PreparedRequest, resp: requests.Response):
+        """
+        Record the response for the given request.
+        """
+        key = self._get_key(request)
+        with self._lock:
+            self._occurrences[key] += 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, self._occurrences[key], resp.status_code, resp.reason, resp.url,
+                 json.dumps(list(resp.headers.items())), zlib.compress(resp.content or b""))
+            )
+            self._pending += 1
+            if self._pending >= self._COMMIT_INTERVAL:
+                self._db.commit()
+                self._pending = 0
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        """
+        Replay the recorded response for the given request.
+
+        :raises: :py:class:`InteractionNotRecorded`
+        """
+        key = self._get_key(request)
+        with self._lock:
+            self._occurrences[key] += 1
+            row = self._db.execute(
+                "SELECT status_code, reason, url, headers, body FROM interactions "
+                "WHERE key = ? AND occurrence <= ? ORDER BY occurrence DESC LIMIT 1",
+                (key, self._occurrences[key])
+            ).fetchone()
+        if not row:
+            raise InteractionNotRecorded(f"{request.method} {request.url} has not been recorded in {self.path}")
+
+        status_code, reason, url, headers, body = row
+        resp = requests.Response()
+        resp.status_code = status_code
+        resp.reason = reason
+        resp.url = url
+        resp.headers = requests.structures.CaseInsensitiveDict(json.loads(headers))
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp._content = zlib.decompress(body)
+        resp._content_consumed = True
+        resp.request = request
+        return resp
+
+
+class CassetteAdapter(requests.adapters.BaseAdapter):
+    """
+    A transport adapter recording (by delegating actual requests to ``adapter``) or replaying interactions
+    from a :py:class:`Cassette`. It is automatically mounted by a :py:class:`Session` created with a cassette.
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self, cassette: Cassette, adapter: requests.adapters.BaseAdapter = None):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter or requests.adapters.HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == Cassette.REPLAY:
+            resp = self.cassette.replay(request)
+            resp.connection = self
+            return resp
+
+        resp = self.adapter.send(request, **kwargs)
+        self.cassette.record(request, resp)
+        return resp
+
+    def close(self):
+        self.adapter.close()
+
+
+class _CacheEntry:
+    __slots__ = ("status_code", "reason", "url", "headers", "content", "vary", "expires_at", "response_time")
+
+    def __init__(self, status_code, reason, url, headers, content, vary, expires_at, response_time):
+        self.status_code = status_code
+        self.reason = reason
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.vary = vary
+        self.expires_at = expires_at
+        # the (local clock) time at which the response has been generated by the origin server
+        self.response_time = response_time
+
+    def build_response(self, request: requests.PreparedRequest) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = self.status_code
+        resp.reason = self.reason
+        resp.url = self.url
+        resp.headers = requests.structures.CaseInsensitiveDict(self.headers)
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp._content = self.content
+        resp._content_consumed = True
+        resp.request = request
+        return resp
+
+
+class HttpCache:
+    """
+    A client-side HTTP cache to be used by a :py:class:`Session`::
+
+        session = Session(base_url="https://api.example.net", cache=HttpCache())
+
+    Only the (non-streamed) ``GET`` requests are cached, according to the ``Cache-Control`` (``no-store``,
+    ``no-cache``, ``max-age``), ``Expires``, ``ETag`` and ``Last-Modified`` response headers: a fresh entry is served
+    without any network I/O while a stale entry having a validator is revalidated through a conditional
+    request (its body being served from the cache on a ``304 Not Modified`` response). Responses without explicit
+    freshness information are only cached if they have a validator (they are then revalidated each time).
+    Requests carrying their own conditional headers or a ``Cache-Control: no-store`` header bypass the cache.
+
+    At most ``max_entries`` entries are kept in memory (the least recently used entries being evicted first).
+    If ``path`` is set, entries are also stored into an SQLite database (with compressed bodies) that survives
+    the memory eviction and can be shared between runs.
+
+    .. versionadded:: 0.5.0
+    """
+    _CACHEABLE_STATUS_CODES = (200, 203, 404, 410)
+    _CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since", "If-Match", "If-Unmodified-Since", "If-Range", "Range")
+    _MAX_AGE_REGEXP = re.compile(r"max-age\s*=\s*(\d+)")
+
+    def __init__(self, max_entries: int = 256, path: str = None):
+        #: The maximum number of entries kept in memory.
+        self.max_entries: int = max_entries
+        #: The optional path of the on-disk cache.
+        self.path: Optional[str] = path
+        #: The number of responses served from the cache (including revalidated entries).
+        self.hits: int = 0
+        #: The number of responses not served from the cache.
+        self.misses: int = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, status_code INTEGER, reason TEXT, url TEXT, headers TEXT, vary TEXT, "
+                "expires_at REAL, response_time REAL, body BLOB)"
+            )
+            self._db.commit()
+
+    def close(self):
+        """
+        Close the on-disk cache, if any.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "HttpCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    @staticmethod
+    def _get_key(request: requests.PreparedRequest) -> str:
+        # credentials are part of the key so that responses are never shared between different users
+        return hashlib.sha1("\n".join((
+            request.url, request.headers.get("Authorization", ""), request.headers.get("Cookie", "")
+        )).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _get_directives(headers) -> str:
+        return headers.get("Cache-Control", "").lower()
+
+    @staticmethod
+    def _get_response_time(headers) -> float:
+        age = headers.get("Age", "0")
+        return time.time() - (int(age) if age.isdigit() else 0)
+
+    def _get_expires_at(self, headers) -> float:
+        directives = self._get_directives(headers)
+        if "no-cache" in directives:
+            return 0.0
+        match = self._MAX_AGE_REGEXP.search(directives)
+        if match:
+            return self._get_response_time(headers) + int(match.group(1))
+        if "Expires" in headers:
+            try:
+                expires = email.utils.parsedate_to_datetime(headers["Expires"]).timestamp()
+                date = email.utils.parsedate_to_datetime(headers["Date"]).timestamp() if "Date" in headers else None
+            except (TypeError, ValueError):
+                return 0.0
+            # freshness is computed relatively to the server clock
+            return time.time() + expires - date if date is not None else expires
+        return 0.0
+
+    def is_cacheable_request(self, request: requests.PreparedRequest) -> bool:
+        """
+        Return whether or not the response of ``request`` can be served from or stored into the cache.
+        """
+        return (
+            request.method == "GET" and "no-store" not in self._get_directives(request.headers) and
+            not any(header in request.headers for header in self._CONDITIONAL_HEADERS)
+        )
+
+    def _load(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT status_code, reason, url, headers, vary, expires_at, response_time, body FROM entries "
+            "WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status_code, reason, url, headers, vary, expires_at, response_time, body = row
+        entry = _CacheEntry(status_code, reason, url, json.loads(headers), zlib.decompress(body), json.loads(vary),
+                            expires_at, response_time)
+        self._store_in_memory(key, entry)
+        return entry
+
+    def _store_in_memory(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, key, entry):
+        self._store_in_memory(key, entry)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.status_code, entry.reason, entry.url, json.dumps(entry.headers), json.dumps(entry.vary),
+                 entry.expires_at, entry.response_time, zlib.compress(entry.content))
+            )
+            self._db.commit()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, request: requests.PreparedRequest):
+        """
+        Return the cache entry matching ``request`` (whether it is fresh or not), ``None`` if there is none.
+        """
+        with self._lock:
+            entry = self._load(self._get_key(request))
+        if entry is None:
+            return None
+        if any(request.headers.get(name) != value for name, value in entry.vary.items()):
+            return None
+        return entry
+
+    def is_fresh(self, request: requests.PreparedRequest, entry) -> bool:
+        """
+        Return whether or not ``entry`` can be served without being revalidated.
+        """
+        directives = self._get_directives(request.headers)
+        if "no-cache" in directives:
+            return False
+        match = self._MAX_AGE_REGEXP.search(directives)
+        if match and time.time() - entry.response_time >= int(match.group(1)):
+            # the client does not accept a response older than the requested max-age
+            return False
+        return time.time() < entry.expires_at
+
+    def store(self, request: requests.PreparedRequest, resp: requests.Response):
+        """
+        Store ``resp`` into the cache if it is cacheable.
+        """
+        directives = self._get_directives(resp.headers)
+        vary = [name.strip() for name in resp.headers.get("Vary", "").split(",") if name.strip()]
+        if resp.status_code not in self._CACHEABLE_STATUS_CODES or "no-store" in directives or "*" in vary:
+            return
+        expires_at = self._get_expires_at(resp.headers)
+        if expires_at <= time.time() and "ETag" not in resp.headers and "Last-Modified" not in resp.headers:
+            return
+
+        entry = _CacheEntry(
+            resp.status_code, resp.reason, resp.url, dict(resp.headers), resp.content,
+            {name: request.headers.get(name) for name in vary}, expires_at, self._get_response_time(resp.headers)
+        )
+        with self._lock:
+            self._store(self._get_key(request), entry)
+
+    def revalidate(self, request: requests.PreparedRequest, entry, resp: requests.Response):
+        """
+        Update ``entry`` with the headers of the ``304 Not Modified`` response ``resp``.
+        """
+        headers = dict(entry.headers)
+        headers.update(
+            (name, value) for name, value in resp.headers.items()
+            if name.lower() not in ("content-length", "content-encoding", "transfer-encoding")
+        )
+        entry = _CacheEntry(
+            entry.status_code, entry.reason, entry.url, headers, entry.content, entry.vary,
+            self._get_expires_at(requests.structures.CaseInsensitiveDict(headers)),
+            self._get_response_time(resp.headers)
+        )
+        with self._lock:
+            self._store(self._get_key(request), entry)
+        return entry
+
+    def get_conditional_headers(self, entry) -> dict:
+        """
+        Return the headers to be sent to revalidate ``entry``.
+        """
+        headers = requests.structures.CaseInsensitiveDict(entry.headers)
+        conditional_headers = {}
+        if "ETag" in headers:
+            conditional_headers["If-None-Match"] = headers["ETag"]
+        if "Last-Modified" in headers:
+            conditional_headers["If-Modified-Since"] = headers["Last-Modified"]
+        return conditional_headers
+
+
+class LatencyHistogram:
+    """
+    A fixed-memory latency histogram.
+
+    Values (in seconds) are counted in logarithmic buckets (each bucket being 2% wider than the previous one),
+    recording a value is O(1) and histograms can be merged, percentiles are estimated with a 2% relative precision.
+
+    .. versionadded:: 0.5.0
+    """
+    _MIN_VALUE = 1e-6
+    _MAX_VALUE = 3600.0
+    _GROWTH = 1.02
+    _LOG_GROWTH = math.log(_GROWTH)
+    _SIZE = int(math.log(_MAX_VALUE / _MIN_VALUE) / _LOG_GROWTH) + 2
+
+    def __init__(self):
+        self._buckets = [0] * self._SIZE
+        #: The number of recorded values.
+        self.count: int = 0
+        #: The sum of the recorded values.
+        self.total: float = 0.0
+        #: The greatest recorded value.
+        self.max: float = 0.0
+
+    def record(self, value: float):
+        """
+        Record a value (in seconds).
+        """
+        if value <= self._MIN_VALUE:
+            index = 0
+        else:
+            index = min(int(math.log(value / self._MIN_VALUE) / self._LOG_GROWTH) + 1, self._SIZE - 1)
+        self._buckets[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """
+        Add the values recorded by ``other`` to this histogram.
+        """
+        self._buckets = [a + b for a, b in zip(self._buckets, other._buckets)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Return the (estimated) value below which ``percent`` percent of the recorded values fall,
+        ``None`` if no value has been recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(math.ceil(self.count * percent / 100), 1)
+        cumulated = 0
+        for index, bucket in enumerate(self._buckets):
+            cumulated += bucket
+            if cumulated >= rank:
+                return min(self._MIN_VALUE * self._GROWTH ** index, self.max)
+        return self.max  # pragma: no cover
+
+
+class LatencyStats:
+    """
+    Collect the latency (the response ``elapsed`` time) of the requests performed by one or more sessions,
+    per method and URL template (IDs in URL paths, such as ``/users/42``, are collapsed into ``/users/{id}``).
+
+    The collector is enabled by passing it to a session::
+
+        stats = LatencyStats()
+        session = Session(base_url="https://api.github.com", latency_stats=stats)
+
+    and its report is typically saved at the end of the run, for instance in the teardown of a session-scoped
+    fixture::
+
+        @lcc.fixture(scope="session")
+        def session():
+            stats = LatencyStats()
+            yield Session(base_url="https://api.github.com", latency_stats=stats)
+            stats.save_report()
+
+    .. versionadded:: 0.5.0
+    """
+    PERCENTILES = (50, 90, 99)
+
+    _ID_REGEXP = re.compile(
+        r"\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,}"
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def __getstate__(self):
+        return {"_histograms": self._histograms}
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self._histograms = state["_histograms"]
+
+    @classmethod
+    def url_template(cls, url: str) -> str:
+        """
+        Return the template of ``url``: its path where every ID-like segment (an integer, an UUID
+        or a long hexadecimal string) is replaced by ``{id}``.
+        """
+        path = urllib.parse.urlsplit(url).path or "/"
+        return "/".join("{id}" if cls._ID_REGEXP.fullmatch(segment) else segment for segment in path.split("/"))
+
+    def record(self, method: str, url: str, elapsed: float):
+        """
+        Record the ``elapsed`` time (in seconds) of a request.
+        """
+        key = (method.upper(), self.url_template(url))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(elapsed)
+
+    def merge(self, other: "LatencyStats"):
+        """
+        Add the latencies collected by ``other`` to this collector.
+        """
+        with self._lock:
+            for key, histogram in other._histograms.items():
+                if key in self._histograms:
+                    self._histograms[key].merge(histogram)
+                else:
+                    self._histograms[key] = copy.deepcopy(histogram)
+
+    def get_histogram(self, method: str, url_template: str) -> Optional[LatencyHistogram]:
+        """
+        Return the histogram of the given method and URL template, ``None`` if no request matches.
+        """
+        return self._histograms.get((method.upper(), url_template))
+
+    def report(self) -> List[dict]:
+        """
+        Return the statistics as a list of dicts (one per method and URL template, sorted by URL template)
+        with ``method``, ``url``, ``count``, ``mean``, ``p50``, ``p90``, ``p99`` and ``max`` keys
+        (durations are in seconds).
+        """
+        with self._lock:
+            items = sorted(self._histograms.items(), key=lambda item: (item[0][1], item[0][0]))
+            return [
+                dict(
+                    method=method, url=url, count=histogram.count, mean=histogram.total / histogram.count,
+                    **{f"p{percent}": histogram.percentile(percent) for percent in self.PERCENTILES},
+                    max=histogram.max
+                )
+                for (method, url), histogram in items
+            ]
+
+    def format_report(self) -> str:
+        """
+        Return the statistics as a text table.
+        """
+        rows = [("Method", "URL", "Count", "Mean", "P50", "P90", "P99", "Max")]
+        for entry in self.report():
+            rows.append(
+                (entry["method"], entry["url"], str(entry["count"])) +
+                tuple("%.03fs" % entry[key] for key in ("mean", "p50", "p90", "p99", "max"))
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(
+                value.ljust(width) if i < 2 else value.rjust(width) for i, (value, width) in enumerate(zip(row, widths))
+            ).rstrip()
+            for row in rows
+        )
+
+    def save(self, path: str):
+        """
+        Save the statistics (as returned by :py:meth:`report`) as JSON into ``path``.
+        """
+        with open(path, "w") as fh:
+            json.dump(self.report(), fh, indent=4)
+
+    def save_report(self, description: str = "HTTP latency statistics"):
+        """
+        Save the statistics into the report as two attachments: a text table and a JSON file.
+        """
+        lcc.save_attachment_content(self.format_report(), "latency_stats.txt", description)
+        lcc.save_attachment_content(json.dumps(self.report(), indent=4), "latency_stats.json", f"{description} (JSON)")
+
+
+class LatencyBudget:
+    """
+    A latency budget to be enforced by a session: every response exceeding its endpoint limit and every test whose
+    cumulative response time exceeds ``per_test`` is flagged in the report as a failed check (nothing is logged
+    as long as the budget is met)::
+
+        budget = LatencyBudget(default=1.0, endpoints={"GET /users/{id}": 0.2, "/search": 3.0}, per_test=10.0)
+        session = Session(base_url="https://api.example.net", latency_budget=budget)
+
+    The limits (in seconds) of ``endpoints`` are keyed by URL template (see :py:meth:`LatencyStats.url_template`),
+    optionally prefixed by a method; ``default`` applies to the endpoints not listed in ``endpoints``.
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self, default: float = None, endpoints: dict = None, per_test: float = None):
+        #: The limit (in seconds) of the endpoints not listed in :py:attr:`endpoints`.
+        self.default: Optional[float] = default
+        #: The per-endpoint limits (in seconds).
+        self.endpoints: dict = dict(endpoints or {})
+        #: The limit (in seconds) of the cumulative response time of a test.
+        self.per_test: Optional[float] = per_test
+        self._lock = threading.Lock()
+        # the cumulative response time and whether it has already been flagged, per report location
+        self._tests = collections.OrderedDict()
+
+    def get_limit(self, method: str, url: str) -> Optional[float]:
+        """
+        Return the limit (in seconds) applying to the given request, ``None`` if there is none.
+        """
+        template = LatencyStats.url_template(url)
+        limit = self.endpoints.get(f"{method.upper()} {template}")
+        if limit is None:
+            limit = self.endpoints.get(template, self.default)
+        return limit
+
+    def check(self, resp: "Response"):
+        """
+        Check the response time of ``resp`` against the budget.
+        """
+        elapsed = resp.elapsed.total_seconds()
+        limit = self.get_limit(resp.request.method, resp.request.url)
+        if limit is not None and elapsed > limit:
+            resp._flush_deferred_logs()
+            _emit(
+                lcc.log_check,
+                f"Expect {resp.request.method} {LatencyStats.url_template(resp.request.url)} "
+                f"to respond within {limit:.03f}s", False, f"got {elapsed:.03f}s"
+            )
+
+        if self.per_test is None:
+            return
+        location = _get_report_location()
+        with self._lock:
+            test = self._tests.get(location)
+            if test is None:
+                test = self._tests[location] = [0.0, False]
+                while len(self._tests) > _MAX_TRACKED_LOCATIONS:
+                    self._tests.popitem(last=False)
+            else:
+                self._tests.move_to_end(location)
+            test[0] += elapsed
+            test_elapsed = test[0]
+            exceeded = test_elapsed > self.per_test and not test[1]
+            if exceeded:
+                test[1] = True
+        if exceeded:
+            resp._flush_deferred_logs()
+            _emit(
+                lcc.log_check,
+                f"Expect the cumulative HTTP response time of the test to be within {self.per_test:.03f}s", False,
+                f"got {test_elapsed:.03f}s"
+            )
+
+
+class LoadResult:
+    """
+    The result of a load test (see :py:meth:`Session.load`).
+
+    Results can be checked with lemoncheesecake matchers, either directly::
+
+        check_that("throughput", result.throughput, greater_than(100))
+
+    or through the :py:meth:`check`, :py:meth:`require` and :py:meth:`assert_` methods which take a ``dict`` whose keys
+    are those of :py:meth:`as_dict`::
+
+        result.check({"throughput": greater_than(100), "error_rate": equal_to(0), "p99": less_than(0.5)})
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self):
+        #: The number of performed requests.
+        self.requests: int = 0
+        #: The number of failed requests (requests raising an exception or whose status code is 4xx or 5xx).
+        self.errors: int = 0
+        #: The actual duration (in seconds) of the load test.
+        self.duration: float = 0.0
+        #: The number of responses per status code.
+        self.status_codes: collections.Counter = collections.Counter()
+        #: The number of requests per raised exception class name.
+        self.exceptions: collections.Counter = collections.Counter()
+        #: The histogram of the requests duration (only the requests that did not raise an exception are measured).
+        self.histogram: LatencyHistogram = LatencyHistogram()
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of requests per second.
+        """
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """
+        The ratio (between 0 and 1) of failed requests.
+        """
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Return the (estimated) request duration below which ``percent`` percent of the requests durations fall.
+        """
+        return self.histogram.percentile(percent)
+
+    def record(self, duration: Optional[float], status_code: int = None, exception: Exception = None):
+        """
+        Record a request: its ``duration`` and ``status_code`` if it succeeded or the ``exception`` it raised.
+        """
+        self.requests += 1
+        if exception is not None:
+            self.errors += 1
+            self.exceptions[exception.__class__.__name__] += 1
+            return
+        if status_code >= 400:
+            self.errors += 1
+        self.status_codes[status_code] += 1
+        self.histogram.record(duration)
+
+    def merge(self, other: "LoadResult"):
+        """
+        Add the results of ``other`` (a load test that ran concurrently) to this result.
+        """
+        self.requests += other.requests
+        self.errors += other.errors
+        self.duration = max(self.duration, other.duration)
+        self.status_codes.update(other.status_codes)
+        self.exceptions.update(other.exceptions)
+        self.histogram.merge(other.histogram)
+
+    def as_dict(self) -> dict:
+        """
+        Return the results as a ``dict`` with ``requests``, ``errors``, ``duration``, ``throughput``, ``error_rate``,
+        ``p50``, ``p90``, ``p99`` and ``max`` keys (durations are in seconds).
+        """
+        return dict(
+            requests=self.requests, errors=self.errors, duration=self.duration,
+            throughput=self.throughput, error_rate=self.error_rate,
+            **{f"p{percent}": self.percentile(percent) for percent in LatencyStats.PERCENTILES},
+            max=self.histogram.max
+        )
+
+    def format(self) -> str:
+        """
+        Return the results as text.
+        """
+        content = "Requests: %d (%.01f req/s over %.03fs)\n" % (self.requests, self.throughput, self.duration)
+        content += "Errors: %d (%.02f%%)\n" % (self.errors, self.error_rate * 100)
+        content += "Latency: %s, max %.03fs\n" % (
+            ", ".join(
+                "p%d %.03fs" % (percent, self.percentile(percent) or 0) for percent in LatencyStats.PERCENTILES
+            ),
+            self.histogram.max
+        )
+        content += "Status codes: %s" % (
+            ", ".join(f"{code} x {count}" for code, count in sorted(self.status_codes.items())) or "none"
+        )
+        if self.exceptions:
+            content += "\nExceptions: %s" % ", ".join(
+                f"{name} x {count}" for name, count in sorted(self.exceptions.items())
+            )
+        return content
+
+    def save_report(self, description: str = "Load test results"):
+        """
+        Save the results into the report as an attachment.
+        """
+        lcc.save_attachment_content(self.format(), "load_results.txt", description)
+
+    def _to_matchers(self, expected: dict) -> dict:
+        return {key: is_(value) for key, value in expected.items()}
+
+    def check(self, expected: dict) -> "LoadResult":
+        """
+        Check the results using the :py:func:`lemoncheesecake.matching.check_that_in` function.
+        """
+        check_that_in(self.as_dict(), self._to_matchers(expected))
+        return self
+
+    def require(self, expected: dict) -> "LoadResult":
+        """
+        Check the results using the :py:func:`lemoncheesecake.matching.require_that_in` function.
+        """
+        require_that_in(self.as_dict(), self._to_matchers(expected))
+        return self
+
+    def assert_(self, expected: dict) -> "LoadResult":
+        """
+        Check the results using the :py:func:`lemoncheesecake.matching.assert_that_in` function.
+        """
+        assert_that_in(self.as_dict(), self._to_matchers(expected))
+        return self
+
+
+def _run_load(session, specs, duration, concurrency, rate, log_every):
+    # drive the load using `concurrency` threads, each thread collects its own result so that recording
+    # is lock-free, results are merged once the threads are done
+    specs = list(specs)
+    if not specs:
+        raise ValueError("At least one request spec must be provided")
+    counter = itertools.count()
+    logger_off = Logger.off()
+    caller = _get_caller()
+    sampled = []
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def worker():
+        result = LoadResult()
+        while True:
+            index = next(counter)
+            if rate:
+                slot = start + index / rate
+                if slot >= deadline:
+                    break
+                delay = slot - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif time.perf_counter() >= deadline:
+                break
+
+            logged = bool(log_every) and index % log_every == 0
+            request_start = time.perf_counter()
+            buffer, resp, exc = session._buffered_request(
+                specs[index % len(specs)], None if logged else logger_off, caller
+            )
+            request_duration = time.perf_counter() - request_start
+            if logged:
+                sampled.append((index, buffer))
+            if exc is not None:
+                result.record(None, exception=exc)
+            else:
+                result.record(request_duration, status_code=resp.status_code)
+        return result
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker) for _ in range(concurrency)]
+        results = [future.result() for future in futures]
+
+    result = LoadResult()
+    for worker_result in results:
+        result.merge(worker_result)
+    result.duration = time.perf_counter() - start
+    return result, [buffer for _, buffer in sorted(sampled, key=lambda item: item[0])]
+
+
+def _run_load_process(session_factory, specs, duration, concurrency, rate):
+    with session_factory() as session:
+        result, _ = _run_load(session, specs, duration, concurrency, rate, None)
+    return result
+
+
+def load_with_processes(session_factory: collections.abc.Callable, specs: Iterable[Union[str, dict]],
+                        duration: float, processes: int = None, concurrency: int = None, rate: float = None,
+                        save_report: bool = True) -> LoadResult:
+    """
+    Perform a load test (like :py:meth:`Session.load`) spread across ``processes`` processes (defaults to the
+    number of CPUs), so that the load is not limited by the GIL.
+
+    Each process builds its own session (and then its own connection pool) by calling ``session_factory``, which
+    must be picklable (a module-level function or a :py:func:`functools.partial` of :py:class:`Session` for instance,
+    the processes being spawned, it must be importable by a fresh interpreter), and runs ``concurrency`` threads; ``rate`` is the overall rate, it is evenly split between processes.
+    The results of the processes are merged into a single :py:class:`LoadResult` which is, unless ``save_report``
+    is ``False``, saved into the report as an attachment::
+
+        result = load_with_processes(
+            functools.partial(Session, base_url="https://api.example.net"), ["/items/1"], duration=30, processes=4
+        )
+        result.check({"throughput": greater_than(5000)})
+
+    Requests are never logged.
+
+    .. versionadded:: 0.5.0
+    """
+    specs = list(specs)
+    if not specs:
+        raise ValueError("At least one request spec must be provided")
+    processes = processes or os.cpu_count() or 1
+    concurrency = concurrency or requests.adapters.DEFAULT_POOLSIZE
+    rate = rate / processes if rate else None
+
+    result = LoadResult()
+    # the processes are spawned rather than forked, a fork would copy the locks held by the threads of the test
+    # process (background logging, connection pools, etc...) in their current state
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(_run_load_process, session_factory, specs, duration, concurrency, rate)
+            for _ in range(processes)
+        ]
+        for future in futures:
+            result.merge(future.result())
+
+    if save_report:
+        result.save_report(f"Load test results ({processes} processes)")
+    return result
+
+
+class Attempt:
+    """
+    An attempt of a request performed with a :py:class:`RetryPolicy` (see :py:attr:`Response.attempts`).
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self, method: str, url: str, response: "Response" = None, exception: Exception = None,
+                 elapsed: float = 0.0, delay: float = None):
+        #: The request method.
+        self.method: str = method
+        #: The request URL.
+        self.url: str = url
+        #: The attempt response, ``None`` if the attempt raised an exception.
+        self.response: Optional["Response"] = response
+        #: The exception raised by the attempt, if any.
+        self.exception: Optional[Exception] = exception
+        #: The attempt duration (in seconds).
+        self.elapsed: float = elapsed
+        #: The delay (in seconds) before the next attempt, ``None`` for the last attempt.
+        self.delay: Optional[float] = delay
+
+    def __str__(self):
+        outcome = self.exception.__class__.__name__ if self.response is None else str(self.response.status_code)
+        content = "%s %s => %s (%.03fs)" % (self.method, self.url, outcome, self.elapsed)
+        if self.delay is not None:
+            content += ", retried after %.03fs" % self.delay
+        return content
+
+
+class RetryPolicy:
+    """
+    A retry policy to be used by a :py:class:`Session`::
+
+        session = Session(base_url="https://api.example.net", retry=RetryPolicy(total=3, budget=10))
+
+    A request is retried (at most ``total`` times) if its method is one of ``methods`` (the idempotent methods by
+    default) and if its response status code is one of ``status_codes`` or if it raised one of ``exceptions``
+    (connection errors and timeouts by default).
+
+    The delay before a retry is the response ``Retry-After`` header value if any (and ``respect_retry_after`` is
+    ``True``), otherwise ``backoff_factor * 2 ** (retry number - 1)`` seconds (capped by ``max_backoff``), randomized
+    between 0 and this value if ``jitter`` is ``True``. No retry is performed if the ``Retry-After`` delay exceeds
+    ``max_retry_after`` or if the delay would exceed the total time ``budget`` (in seconds) of the request.
+
+    .. versionadded:: 0.5.0
+    """
+    DEFAULT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE")
+    DEFAULT_STATUS_CODES = (502, 503, 504)
+    DEFAULT_EXCEPTIONS = (
+        requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError
+    )
+
+    def __init__(self, total: int = 3, methods: Iterable[str] = DEFAULT_METHODS,
+                 status_codes: Iterable[int] = DEFAULT_STATUS_CODES, exceptions: tuple = DEFAULT_EXCEPTIONS,
+                 backoff_factor: float = 0.5, max_backoff: float = 30.0, jitter: bool = True,
+                 respect_retry_after: bool = True, max_retry_after: float = 60.0, budget: float = None):
+        #: The maximum number of retries.
+        self.total: int = total
+        #: The methods of the requests that can be retried.
+        self.methods: frozenset = frozenset(method.upper() for method in methods)
+        #: The response status codes triggering a retry.
+        self.status_codes: frozenset = frozenset(status_codes)
+        #: The exception classes triggering a retry.
+        self.exceptions: tuple = tuple(exceptions)
+        #: The backoff factor (in seconds).
+        self.backoff_factor: float = backoff_factor
+        #: The maximum backoff delay (in seconds).
+        self.max_backoff: float = max_backoff
+        #: Whether or not the backoff delay is randomized.
+        self.jitter: bool = jitter
+        #: Whether or not the ``Retry-After`` response header is honoured.
+        self.respect_retry_after: bool = respect_retry_after
+        #: The maximum ``Retry-After`` delay (in seconds) that is waited for, the request is not retried if the
+        #: server asks for a longer delay.
+        self.max_retry_after: float = max_retry_after
+        #: The maximum total time (in seconds) of a request including its retries.
+        self.budget: Optional[float] = budget
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=datetime.timezone.utc)
+        return max((date - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+    def get_delay(self, attempt: Attempt, number: int, elapsed: float) -> Optional[float]:
+        """
+        Return the delay (in seconds) before retrying the ``number``-th ``attempt`` of a request which has been
+        running for ``elapsed`` seconds, ``None`` if the request must not be retried.
+        """
+        if number > self.total or attempt.method.upper() not in self.methods:
+            return None
+        if attempt.response is None:
+            if not isinstance(attempt.exception, self.exceptions):
+                return None
+        elif attempt.response.status_code not in self.status_codes:
+            return None
+
+        delay = None
+        if attempt.response is not None and self.respect_retry_after:
+            delay = self._parse_retry_after(attempt.response.headers.get("Retry-After"))
+            if delay is not None and delay > self.max_retry_after:
+                return None
+        if delay is None:
+            delay = min(self.backoff_factor * 2 ** (number - 1), self.max_backoff)
+            if self.jitter:
+                delay = random.uniform(0, delay)
+        if self.budget is not None and elapsed + delay > self.budget:
+            return None
+        return delay
+
+
+class _Flight:
+    # an in-flight request shared by concurrent identical requests (see Session.single_flight)
+    __slots__ = ("id", "event", "followers", "response", "exception")
+
+    def __init__(self, id_):
+        self.id = id_
+        self.event = threading.Event()
+        self.followers = 0
+        self.response = None
+        self.exception = None
+
+    def copy_response(self, request: requests.PreparedRequest) -> requests.Response:
+        resp = requests.Response()
+        for name in ("status_code", "reason", "url", "encoding", "history", "timings", "cache_status"):
+            setattr(resp, name, getattr(self.response, name, None))
+        resp.headers = requests.structures.CaseInsensitiveDict(self.response.headers)
+        resp.cookies = self.response.cookies.copy()
+        resp._content = self.response.content
+        resp._content_consumed = True
+        resp.request = request
+        resp.shared_call = self.id
+        resp.coalesced = True
+        return resp
+
+
+class _SessionCall:
+    __slots__ = ("session", "logger", "hint", "orig_request")
+
+    def __init__(self, session: "Session", logger: Logger, hint: Optional[str]):
+        self.session = session
+        self.logger = logger
+        self.hint = hint
+        self.orig_request = requests.Request()
+
+
+_current_call: "contextvars.ContextVar[Optional[_SessionCall]]" = contextvars.ContextVar(
+    "lemoncheesecake_requests_current_call", default=None
+)
+
+
 class Session(requests.Session):
     """
     The Session class.
@@ -437,8 +3101,43 @@ class Session(requests.Session):
         session.get("/foo", logger=Logger.off())
 
     - return an instance of :py:class:`lemoncheesecake_requests.Response`
+
+    Several requests can also be performed concurrently through :py:meth:`map` and a load test can be
+    performed through :py:meth:`load`.
+
+    If a :py:class:`Cassette` is passed, the session HTTP interactions are either recorded into or replayed from
+    this cassette.
+
+    If a :py:class:`LatencyStats` is passed, the latency of every response is recorded into it.
+
+    If a :py:class:`LatencyBudget` is passed, every response is checked against it.
+
+    If a :py:class:`RetryPolicy` is passed, the requests are retried according to this policy.
+
+    If a :py:class:`HttpCache` is passed, the ``GET`` requests responses are cached.
+
+    Client-side limits can be set through ``limits``, a ``dict`` whose keys are URL prefixes
+    (such as ``"https://api.example.net/v2/"``) or hosts (such as ``"api.example.net"``) and values are
+    :py:class:`RateLimit` instances (the most specific key matching a request URL applies).
+
+    If ``single_flight`` is ``True``, concurrent identical ``GET``/``HEAD`` requests (same URL and headers)
+    share a single HTTP call: the first request is actually performed while the other ones wait for its response,
+    each caller getting its own copy of the response.
+
+    The connection pools can be configured through the ``pool_connections`` (the number of hosts whose connection
+    pool is kept), ``pool_maxsize`` (the maximum number of connections kept per host) and ``pool_block``
+    (whether or not a request must wait for a connection to be available instead of opening a connection that
+    will not be kept once the pool is full) arguments, see :py:class:`requests.adapters.HTTPAdapter`.
+
+    If ``dns_timings`` is ``True``, the host resolution of new connections is measured separately
+    (see :py:attr:`Timings.dns`): the session then resolves the host itself before connecting to the resolved
+    addresses, otherwise the connections are set up by urllib3 and the DNS resolution is part of
+    :py:attr:`Timings.connect`.
     """
-    def __init__(self, base_url="", logger=None, hint=None):
+    def __init__(self, base_url="", logger=None, hint=None, cassette=None, latency_stats=None,
+                 latency_budget=None, pool_connections=requests.adapters.DEFAULT_POOLSIZE,
+                 pool_maxsize=requests.adapters.DEFAULT_POOLSIZE, pool_block=requests.adapters.DEFAULT_POOLBLOCK,
+                 retry=None, cache=None, single_flight=False, limits=None, dns_timings=False):
         super().__init__()
         #: The base_url will be concatenated to the URL passed to methods such as ``get()``, ``post()`` etc..
         #: to form the complete URL (let the string empty if there is no base_url).
@@ -448,28 +3147,346 @@ class Session(requests.Session):
         self.logger: Logger = logger or Logger.on()
         #: An optional string value to be logged to provide more context to the report reader.
         self.hint: Optional[str] = hint
-        self._last_request = requests.Request()
+        #: The optional cassette used to record/replay the session HTTP interactions.
+        self.cassette: Optional[Cassette] = cassette
+        #: The optional collector of the session requests latency.
+        self.latency_stats: Optional[LatencyStats] = latency_stats
+        #: The optional latency budget enforced by the session.
+        self.latency_budget: Optional[LatencyBudget] = latency_budget
+        #: The optional retry policy of the session requests.
+        self.retry: Optional[RetryPolicy] = retry
+        #: The optional HTTP cache of the session.
+        self.cache: Optional[HttpCache] = cache
+        #: Whether or not concurrent identical requests share a single HTTP call.
+        self.single_flight: bool = single_flight
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._flight_ids = itertools.count(1)
+        #: The client-side limits of the session requests, per URL prefix or host.
+        self.limits: dict = limits if limits is not None else {}
+        for prefix in "https://", "http://":
+            self.mount(
+                prefix,
+                _HTTPAdapter(
+                    pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block,
+                    limits=self.limits, dns_timings=dns_timings
+                )
+            )
+        if cassette:
+            for prefix, adapter in list(self.adapters.items()):
+                self.mount(prefix, CassetteAdapter(cassette, adapter))
+
+    def _get_http_adapters(self):
+        for adapter in self.adapters.values():
+            if isinstance(adapter, CassetteAdapter):
+                adapter = adapter.adapter
+            if isinstance(adapter, _HTTPAdapter):
+                yield adapter
+
+    @property
+    def pool_hits(self) -> int:
+        """
+        The number of requests sent over a connection reused from the pool.
+
+        .. versionadded:: 0.5.0
+        """
+        return sum(adapter.pool_hits for adapter in self._get_http_adapters())
+
+    @property
+    def pool_misses(self) -> int:
+        """
+        The number of requests for which a new connection has been opened.
+
+        .. versionadded:: 0.5.0
+        """
+        return sum(adapter.pool_misses for adapter in self._get_http_adapters())
+
+    def warmup(self, n: int, url: str = "") -> int:
+        """
+        Open ``n`` connections to ``base_url + url`` and keep them in the connection pool so that the
+        subsequent requests do not pay for the connection setup (``n`` is capped by the pool size).
+
+        Return the number of newly opened connections.
+
+        .. versionadded:: 0.5.0
+        """
+        url = self.base_url + url
+        adapter = self.get_adapter(url)
+        if isinstance(adapter, CassetteAdapter):
+            if self.cassette.mode == Cassette.REPLAY:
+                return 0
+            adapter = adapter.adapter
+        if not isinstance(adapter, requests.adapters.HTTPAdapter):
+            return 0
+
+        settings = self.merge_environment_settings(url, {}, None, None, None)
+        request = requests.Request("GET", url).prepare()
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            pool = adapter.get_connection_with_tls_context(
+                request, settings["verify"], settings["proxies"], settings["cert"]
+            )
+        else:  # pragma: no cover (requests < 2.32.2)
+            pool = adapter.get_connection(url, settings["proxies"])
+            adapter.cert_verify(pool, url, settings["verify"], settings["cert"])
+
+        connections = [pool._get_conn() for _ in range(min(n, pool.pool.maxsize))]
+        opened = 0
+        try:
+            for connection in connections:
+                if connection.sock is None:
+                    connection.connect()
+                    opened += 1
+        finally:
+            for connection in connections:
+                pool._put_conn(connection)
+        return opened
 
     def prepare_request(self, request):
+        call = _current_call.get()
+        if call is not None and call.session is not self:
+            call = None
+
         prepared_request = super().prepare_request(request)
-        self.logger.log_request(request, prepared_request, self.hint)
-        self._last_request = request
+        if call:
+            call.logger.log_request(request, prepared_request, call.hint)
+        else:
+            self.logger.log_request(request, prepared_request, self.hint)
+        if call:
+            call.orig_request = request
         return prepared_request
 
+    def _send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        # the time spent waiting for the client-side limits is not part of the response time (the responses of
+        # the redirections are sent through this same method, hence the flag)
+        for r in (*resp.history, resp):
+            timings = getattr(r, "timings", None)
+            if timings and timings.wait and not timings._wait_excluded:
+                r.elapsed -= datetime.timedelta(seconds=timings.wait)
+                timings._wait_excluded = True
+        timings = getattr(resp, "timings", None)
+        if timings and timings.transfer is None and not kwargs.get("stream"):
+            timings.transfer = time.perf_counter() - timings._headers_received_at
+        return resp
+
+    def _send_cached(self, request, **kwargs):
+        cache = self.cache
+        if cache is None or kwargs.get("stream") or not cache.is_cacheable_request(request):
+            return self._send(request, **kwargs)
+
+        start = time.perf_counter()
+        entry = cache.lookup(request)
+        if entry is not None and cache.is_fresh(request, entry):
+            resp = entry.build_response(request)
+            resp.elapsed = datetime.timedelta(seconds=time.perf_counter() - start)
+            resp.cache_status = "hit"
+            cache._count(hit=True)
+            return resp
+
+        conditional_headers = cache.get_conditional_headers(entry) if entry is not None else {}
+        if conditional_headers:
+            conditional_request = request.copy()
+            conditional_request.headers.update(conditional_headers)
+            resp = self._send(conditional_request, **kwargs)
+            if resp.status_code == 304:
+                entry = cache.revalidate(request, entry, resp)
+                resp.close()
+                cached_resp = entry.build_response(request)
+                cached_resp.elapsed = resp.elapsed
+                cached_resp.timings = getattr(resp, "timings", None)
+                cached_resp.cache_status = "revalidated"
+                cache._count(hit=True)
+                return cached_resp
+        else:
+            resp = self._send(request, **kwargs)
+
+        cache._count(hit=False)
+        if not resp.history:
+            cache.store(request, resp)
+        return resp
+
+    def send(self, request, **kwargs):
+        if not self.single_flight or kwargs.get("stream") or request.method not in ("GET", "HEAD") or request.body:
+            return self._send_cached(request, **kwargs)
+
+        key = (
+            request.method, request.url, tuple(sorted((name.lower(), value) for name, value in request.headers.items())),
+            kwargs.get("allow_redirects", True)
+        )
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(next(self._flight_ids))
+            else:
+                flight.followers += 1
+
+        if leader:
+            try:
+                flight.response = self._send_cached(request, **kwargs)
+                return flight.response
+            except Exception as e:
+                flight.exception = e
+                raise
+            finally:
+                with self._flights_lock:
+                    del self._flights[key]
+                    if flight.followers and flight.response is not None:
+                        flight.response.shared_call = flight.id
+                flight.event.set()
+
+        start = time.perf_counter()
+        flight.event.wait()
+        if flight.exception is not None:
+            raise flight.exception
+        resp = flight.copy_response(request)
+        resp.elapsed = datetime.timedelta(seconds=time.perf_counter() - start)
+        return resp
+
+    def _send_request(self, method, url, args, kwargs, logger, hint) -> Response:
+        # the per-call logger and the original request are passed between request() and prepare_request()
+        # through a context variable so that the same session can be safely shared between threads
+        call = _SessionCall(self, logger, hint)
+        token = _current_call.set(call)
+        try:
+            resp = super().request(method, self.base_url + url, *args, **kwargs)
+        except Exception:
+            # the request must be logged before the error is reported
+            logger._drain_background(block=True)
+            raise
+        finally:
+            _current_call.reset(token)
+
+        resp = Response.cast(resp, call.orig_request)
+        resp._logger = logger
+        return resp
+
+    def _send_request_with_retry(self, method, url, args, kwargs, logger) -> Response:
+        # every attempt logs are buffered: they are discarded in favor of a one-line summary if the attempt is
+        # retried, the response of the last attempt only is logged in full
+        attempts = []
+        start = time.perf_counter()
+        while True:
+            number = len(attempts) + 1
+            hint = self.hint if number == 1 else ", ".join(filter(bool, (self.hint, f"attempt {number}")))
+            buffer = []
+            token = _log_buffer.set(buffer)
+            attempt_start = time.perf_counter()
+            try:
+                resp = self._send_request(method, url, args, kwargs, logger, hint)
+                attempt = Attempt(resp.request.method, resp.request.url, response=resp)
+            except Exception as e:
+                attempt = Attempt(method.upper(), self.base_url + url, exception=e)
+            finally:
+                _log_buffer.reset(token)
+            attempt.elapsed = time.perf_counter() - attempt_start
+
+            attempt.delay = self.retry.get_delay(attempt, number, time.perf_counter() - start)
+            if attempt.delay is None:
+                _flush(buffer)
+                if attempt.exception is not None:
+                    raise attempt.exception
+                resp.attempts = attempts + [attempt]
+                logger.log_response(resp, hint)
+                return resp
+
+            attempts.append(attempt)
+            logger.log_retry(attempt, hint)
+            if attempt.response is not None:
+                attempt.response.close()
+            time.sleep(attempt.delay)
+
     def request(self, method, url, *args, **kwargs) -> Response:
         logger = kwargs.pop("logger", self.logger)
+        if self.retry is None:
+            resp = self._send_request(method, url, args, kwargs, logger, self.hint)
+            logger.log_response(resp, self.hint)
+        else:
+            resp = self._send_request_with_retry(method, url, args, kwargs, logger)
 
-        # set actual logger for prepare_request since it cannot be passed another way
-        orig_logger = self.logger
-        self.logger = logger
+        if self.latency_stats is not None:
+            self.latency_stats.record(resp.request.method, resp.request.url, resp.elapsed.total_seconds())
+        if self.latency_budget is not None:
+            self.latency_budget.check(resp)
+
+        return resp
+
+    def _buffered_request(self, spec, logger, caller):
+        if isinstance(spec, str):
+            spec = {"url": spec}
+        kwargs = dict(spec)
+        method = kwargs.pop("method", "GET")
+        url = kwargs.pop("url")
+        if logger is not None:
+            kwargs.setdefault("logger", logger)
+
+        buffer = []
+        token = _log_buffer.set(buffer)
+        caller_token = _caller.set(caller)
         try:
-            resp = super().request(method, self.base_url + url, *args, **kwargs)
+            return buffer, self.request(method, url, **kwargs), None
+        except Exception as e:
+            return buffer, None, e
         finally:
-            self.logger = orig_logger
+            _caller.reset(caller_token)
+            _log_buffer.reset(token)
+
+    def map(self, specs: Iterable[Union[str, dict]], max_workers: int = requests.adapters.DEFAULT_POOLSIZE,
+            logger: Logger = None) -> List[Response]:
+        """
+        Perform several requests concurrently using a pool of ``max_workers`` threads sharing the session
+        connection pool.
+
+        Each request is described either by an URL (a GET request is then performed) or by a ``dict`` of
+        :py:meth:`request` arguments (``method`` defaults to ``"GET"``)::
+
+            responses = session.map(["/items/1", "/items/2", {"method": "DELETE", "url": "/items/3"}])
+
+        The responses are returned in the same order as their requests. The logging of each request/response is
+        kept grouped in the report and follows the same order.
+        If one or more requests raise an exception, the first one (in the requests order) is re-raised once
+        every request has completed.
 
-        logger.log_response(resp, self.hint)
+        .. versionadded:: 0.5.0
+        """
+        responses = []
+        error = None
+        caller = _get_caller()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for buffer, resp, exc in executor.map(lambda spec: self._buffered_request(spec, logger, caller), specs):
+                _flush(buffer)
+                responses.append(resp)
+                if error is None:
+                    error = exc
+
+        if error is not None:
+            raise error
+
+        return responses
+
+    def load(self, specs: Iterable[Union[str, dict]], duration: float, concurrency: int = None,
+             rate: float = None, log_every: int = None) -> LoadResult:
+        """
+        Perform a load test: the requests described by ``specs`` (like with :py:meth:`map`) are performed in a loop
+        during ``duration`` seconds by ``concurrency`` threads sharing the session connection pool::
+
+            result = session.load(["/items/1", {"method": "POST", "url": "/items", "json": {}}], duration=10, rate=50)
+            result.check({"error_rate": equal_to(0), "p99": less_than(0.5)})
+
+        If ``rate`` is set, the requests are paced to ``rate`` requests per second overall (``concurrency``
+        then defaults to the connection pool size), otherwise each thread performs its requests back-to-back.
 
-        return Response.cast(resp, self._last_request)
+        The requests are not logged during the load test, unless ``log_every`` is set: one request out of
+        ``log_every`` is then logged using the session logger (the logs are written once the load test is over).
+
+        .. versionadded:: 0.5.0
+        """
+        result, buffers = _run_load(
+            self, specs, duration, concurrency or requests.adapters.DEFAULT_POOLSIZE, rate, log_every
+        )
+        for buffer in buffers:
+            _flush(buffer)
+        return result
 
     def get(self, url, **kwargs) -> Response:
         return super().get(url, **kwargs)
@@ -493,6 +3510,156 @@ class Session(requests.Session):
         return super().delete(url, **kwargs)
 
 
+class AsyncSession:
+    """
+    The AsyncSession class.
+
+    It is the asyncio counterpart of :py:class:`Session`, HTTP requests are performed using an
+    `httpx <https://www.python-httpx.org/>`_ ``AsyncClient`` (which requires the ``async`` extra:
+    ``pip install lemoncheesecake-requests[async]``) while requests are prepared, logged and checked exactly
+    like with :py:class:`Session`::
+
+        async with AsyncSession(base_url="https://api.github.com") as session:
+            resp = await session.get("/orgs/lemoncheesecake")
+            resp.require_ok()
+
+    The ``request()``, ``get()``, ``options()``, ``head()``, ``post()``, ``put()``, ``patch()`` and ``delete()``
+    coroutines take the same arguments as their :py:class:`Session` counterparts (including the extra ``logger``
+    argument) and return an instance of :py:class:`lemoncheesecake_requests.Response`, except for:
+
+    - ``verify``, ``cert`` and ``proxies``: they are settings of the ``httpx.AsyncClient`` (see its ``verify``,
+      ``cert`` and ``proxy`` arguments) that must be passed to the constructor
+    - ``stream``: streamed responses are not supported
+
+    passing one of these arguments raises a ``TypeError``.
+
+    The logs of each request/response are kept grouped in the report even if several requests are
+    performed concurrently.
+
+    Extra keyword arguments are passed to the underlying ``httpx.AsyncClient``.
+
+    .. versionadded:: 0.5.0
+    """
+    def __init__(self, base_url="", logger=None, hint=None, latency_stats=None, latency_budget=None,
+                 **client_kwargs):
+        if httpx is None:
+            raise ImportError(
+                "AsyncSession requires httpx, install it with: pip install lemoncheesecake-requests[async]"
+            )
+        #: The base_url will be concatenated to the URL passed to methods such as ``get()``, ``post()`` etc..
+        #: to form the complete URL (let the string empty if there is no base_url).
+        self.base_url: str = base_url
+        #: The logger to be used by default for the session logging,
+        #: if not provided, :py:func:`Logger.on` is used.
+        self.logger: Logger = logger or Logger.on()
+        #: An optional string value to be logged to provide more context to the report reader.
+        self.hint: Optional[str] = hint
+        #: The optional collector of the session requests latency.
+        self.latency_stats: Optional[LatencyStats] = latency_stats
+        #: The optional latency budget enforced by the session.
+        self.latency_budget: Optional[LatencyBudget] = latency_budget
+        #: Headers sent with every request.
+        self.headers = requests.utils.default_headers()
+        self._client = httpx.AsyncClient(**client_kwargs)
+
+    async def __aenter__(self) -> "AsyncSession":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Close the underlying HTTP client.
+        """
+        await self._client.aclose()
+
+    @staticmethod
+    def _build_response(resp, request: requests.Request, prepared_request: requests.PreparedRequest,
+                        logger: Logger) -> Response:
+        response = Response()
+        response.status_code = resp.status_code
+        response.headers = requests.structures.CaseInsensitiveDict(resp.headers)
+        response._content = resp.content
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.reason = resp.reason_phrase
+        response.url = str(resp.url)
+        response.elapsed = resp.elapsed
+        response.request = prepared_request
+        response.orig_request = request
+        response._logger = logger
+        return response
+
+    async def request(self, method, url, params=None, data=None, headers=None, cookies=None, files=None,
+                      auth=None, timeout=None, allow_redirects=True, proxies=None, hooks=None, stream=None,
+                      verify=None, cert=None, json=None, logger=None) -> Response:
+        for name, value in (("proxies", proxies), ("verify", verify), ("cert", cert)):
+            if value is not None:
+                raise TypeError(
+                    f"AsyncSession does not support the '{name}' argument per request, "
+                    f"it must be configured on the underlying httpx.AsyncClient through the AsyncSession constructor"
+                )
+        if stream:
+            raise TypeError("AsyncSession does not support streamed responses")
+
+        logger = logger or self.logger
+        request = requests.Request(
+            method=method.upper(), url=self.base_url + url,
+            headers=requests.sessions.merge_setting(
+                headers, self.headers, dict_class=requests.structures.CaseInsensitiveDict
+            ),
+            files=files, data=data or {}, json=json, params=params or {}, auth=auth, cookies=cookies, hooks=hooks
+        )
+        prepared_request = request.prepare()
+
+        # logs are buffered so that they are not interleaved with the logs of concurrent requests
+        buffer = []
+        token = _log_buffer.set(buffer)
+        try:
+            logger.log_request(request, prepared_request, self.hint)
+            resp = await self._client.request(
+                prepared_request.method, prepared_request.url,
+                headers=dict(prepared_request.headers), content=prepared_request.body,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                follow_redirects=allow_redirects
+            )
+            resp = self._build_response(resp, request, prepared_request, logger)
+            resp = requests.hooks.dispatch_hook("response", prepared_request.hooks, resp)
+            if self.latency_stats is not None:
+                self.latency_stats.record(resp.request.method, resp.request.url, resp.elapsed.total_seconds())
+            logger.log_response(resp, self.hint)
+            if self.latency_budget is not None:
+                self.latency_budget.check(resp)
+        finally:
+            _log_buffer.reset(token)
+            _flush(buffer)
+
+        return resp
+
+    async def get(self, url, **kwargs) -> Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def options(self, url, **kwargs) -> Response:
+        return await self.request("OPTIONS", url, **kwargs)
+
+    async def head(self, url, **kwargs) -> Response:
+        kwargs.setdefault("allow_redirects", False)
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url, data=None, json=None, **kwargs) -> Response:
+        return await self.request("POST", url, data=data, json=json, **kwargs)
+
+    async def put(self, url, data=None, **kwargs) -> Response:
+        return await self.request("PUT", url, data=data, **kwargs)
+
+    async def patch(self, url, data=None, **kwargs) -> Response:
+        return await self.request("PATCH", url, data=data, **kwargs)
+
+    async def delete(self, url, **kwargs) -> Response:
+        return await self.request("DELETE", url, **kwargs)
+
+
 def _build_status_code_matcher(n):
     return is_between(
         min=n * 100,  # example: 2 => 200
@@ -526,3 +3693,7 @@ def is_5xx() -> Matcher:
     Test if the value is between 500 and 599.
     """
     return _build_status_code_matcher(5)
+
+
+# the matcher used by the *_ok() methods is built once
+_IS_2XX = is_2xx()
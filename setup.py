@@ -45,5 +45,8 @@ setup(
     },
 
     packages=find_packages(),
-    install_requires=("lemoncheesecake~=1.11", "requests~=2.23")
+    install_requires=("lemoncheesecake~=1.11", "requests~=2.23"),
+    extras_require={
+        "async": ("httpx",),
+    }
 )
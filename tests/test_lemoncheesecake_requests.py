@@ -1,18 +1,33 @@
 import re
 import io
+import json
 import base64
+import functools
+import gc
+import asyncio
+import socket
+import threading
+import time
+import weakref
+from datetime import timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from typing import Any
 
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 import callee
 import pytest
+import requests
 import requests_mock
 from callee import Regex
 
-from lemoncheesecake_requests import Session, Logger, Response, StatusCodeMismatch, \
-    is_2xx, is_3xx, is_4xx, is_5xx
+from lemoncheesecake_requests import Session, AsyncSession, Logger, Response, StatusCodeMismatch, \
+    is_2xx, is_3xx, is_4xx, is_5xx, JsonBackend, OrjsonBackend, set_json_backend, get_json_backend, \
+    Cassette, CassetteAdapter, InteractionNotRecorded, Timings, LatencyHistogram, LatencyStats, \
+    LatencyBudget, ResponseTooSlow, LoadResult, load_with_processes, RetryPolicy, Attempt, \
+    HttpCache, RateLimit, Expectation
+from lemoncheesecake_requests import _JsonObjectScanner, _background_worker
 from lemoncheesecake_requests.__version__ import __version__
-from lemoncheesecake.matching.matchers import equal_to
+from lemoncheesecake.matching.matchers import equal_to, greater_than, less_than, has_length
 from lemoncheesecake.exceptions import AbortTest
 
 
@@ -90,11 +105,73 @@ def test_logger_no_response_body(debug, expected):
     assert logger.debug is expected
 
 
+def test_logger_deferred():
+    logger = Logger.deferred(buffer_size=10)
+    assert logger.request_line_logging is True
+    assert logger.response_body_logging is True
+    assert logger.deferred_logging is True
+    assert logger.deferred_buffer_size == 10
+    assert logger.debug is False
+
+
+def test_logger_background():
+    logger = Logger.background()
+    assert logger.request_line_logging is True
+    assert logger.response_body_logging is True
+    assert logger.background_logging is True
+    assert logger.deferred_logging is False
+
+
 @pytest.fixture
 def lcc_mock(mocker):
     return mocker.patch("lemoncheesecake_requests.lcc")
 
 
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith("/bytes/"):
+            self._reply_bytes(int(self.path.split("/")[2]))
+        else:
+            self._reply({"path": self.path})
+
+    def _reply_bytes(self, size):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        for offset in range(0, size, 65536):
+            self.wfile.write(b"x" * min(65536, size - offset))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._reply({"path": self.path, "body": self.rfile.read(length).decode()}, status_code=201)
+
+    def _reply(self, data, status_code=200):
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield "http://%s:%d" % server.server_address
+    server.shutdown()
+    server.server_close()
+
+
 def mock_session(session=None, **kwargs):
     if not session:
         session = Session(logger=Logger.off())
@@ -380,7 +457,8 @@ def test_session_logger_switching(lcc_mock):
     )
 
 
-def test_bodies_saved_as_attachments(lcc_mock):
+def test_bodies_saved_as_attachments(lcc_mock, tmp_path):
+    lcc_mock.prepare_attachment.return_value.__enter__.return_value = str(tmp_path / "body")
     request_body = "A" * 20
     response_body = "B" * 20
     session = mock_session(text=response_body)
@@ -391,9 +469,203 @@ def test_bodies_saved_as_attachments(lcc_mock):
     lcc_mock.save_attachment_content.assert_any_call(
         callee.Regex(f".*{request_body}.*", re.DOTALL), callee.Any(), "HTTP request body"
     )
-    lcc_mock.save_attachment_content.assert_any_call(
-        callee.Regex(f".*{response_body}.*", re.DOTALL), callee.Any(), "HTTP response body"
+    lcc_mock.prepare_attachment.assert_called_once_with("body.txt", "HTTP response body")
+    assert (tmp_path / "body").read_text() == response_body
+
+
+def test_body_attachment_decision_made_on_raw_size(lcc_mock):
+    # the formatted JSON is larger than max_inlined_body_size, but the raw body is not
+    session = mock_session(json={"foo": "bar"})
+    session.logger = Logger(
+        request_line_logging=False, request_headers_logging=False, request_body_logging=False,
+        response_code_logging=False, response_headers_logging=False, max_inlined_body_size=15
+    )
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, r'HTTP response body.+"foo": "bar"')
+    lcc_mock.prepare_attachment.assert_not_called()
+
+
+@pytest.fixture
+def apparent_encoding_mock(mocker):
+    return mocker.patch.object(
+        requests.Response, "apparent_encoding", new_callable=mocker.PropertyMock, return_value="utf-8"
+    )
+
+
+def body_session(**kwargs):
+    session = mock_session(**kwargs)
+    session.logger.response_body_logging = True
+    return session
+
+
+def test_response_body_binary_content_type(lcc_mock, apparent_encoding_mock, mocker):
+    sniff_encoding = mocker.patch("lemoncheesecake_requests._sniff_encoding")
+    session = body_session(headers={"Content-Type": "application/x-protobuf"}, content=b"foobar")
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, r"HTTP response body \(binary data, displayed as base64\):\nZm9vYmFy")
+    sniff_encoding.assert_not_called()
+    apparent_encoding_mock.assert_not_called()
+
+
+def test_response_body_declared_charset(lcc_mock, apparent_encoding_mock):
+    session = body_session(headers={"Content-Type": "text/csv; charset=\"latin-1\""}, content="café".encode("latin-1"))
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, r"HTTP response body:\ncafé$")
+    apparent_encoding_mock.assert_not_called()
+
+
+def test_response_body_sniffed_on_prefix(lcc_mock, apparent_encoding_mock, mocker):
+    detect = mocker.patch("requests.compat.chardet.detect", return_value={"encoding": "cp1252"})
+    content = "é".encode("cp1252") * 100000
+    session = body_session(headers={"Content-Type": "application/x-custom"}, content=content)
+    session.logger.max_inlined_body_size = None
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, r"HTTP response body:\né{100000}$")
+    detect.assert_called_once_with(content[:4096])
+    apparent_encoding_mock.assert_not_called()
+
+
+@pytest.mark.parametrize("content,expected", (
+    ("foo bar".encode("utf-16"), r"HTTP response body:\nfoo bar$"),
+    ("foo ".encode("utf-8") + "é".encode("utf-8") * 3000, r"HTTP response body:\nfoo é{3000}$"),
+    (b"foo\x00bar", r"HTTP response body \(binary data"),
+    (b"null and void", r"HTTP response body:\nnull and void$"),
+))
+def test_response_body_without_content_type(lcc_mock, apparent_encoding_mock, content, expected):
+    session = body_session(content=content)
+    session.logger.max_inlined_body_size = None
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, expected)
+    apparent_encoding_mock.assert_not_called()
+
+
+def test_json_preview_status_code_mismatch(lcc_mock):
+    session = mock_session(Session(logger=Logger(json_preview=True, json_preview_max_items=2)), json=list(range(100)))
+    resp = session.get("http://www.example.net")
+    with pytest.raises(StatusCodeMismatch) as excinfo:
+        resp.raise_unless_status_code(201)
+    assert re.search(
+        r"HTTP response body \(application/json, \d+ bytes, truncated\):\n\[\n    0,\n    1,\n    ... 98 more items\n\]$",
+        str(excinfo.value)
+    )
+
+
+def test_response_body_kind_not_computed_without_body_logging(lcc_mock, mocker):
+    get_response_body_kind = mocker.spy(Logger, "_get_response_body_kind")
+    session = mock_session(Session(logger=Logger.no_response_body()), content=b"foobar")
+    session.get("http://www.example.net")
+    get_response_body_kind.assert_not_called()
+
+
+def test_json_preview_not_truncated():
+    data = {"foo": [1, 2.5, None, True], "bar": {"baz": "qux", "empty": {}}, "list": []}
+    preview, truncated = Logger(json_preview_max_items=4, json_preview_max_keys=3, json_preview_max_depth=3).\
+        format_json_preview(data)
+    assert preview == JsonBackend().dumps(data)
+    assert not truncated
+
+
+def test_json_preview_truncated():
+    logger = Logger(json_preview_max_items=2, json_preview_max_keys=2, json_preview_max_depth=2,
+                    json_preview_max_string_length=3)
+    preview, truncated = logger.format_json_preview(
+        {"items": list(range(50000)), "nested": {"deeper": {"a": 1}, "list": [[1, 2]]}, "string": "abcde", "last": 1}
     )
+    assert truncated
+    assert preview == """{
+    "items": [
+        0,
+        1,
+        ... 49,998 more items
+    ],
+    "nested": {
+        "deeper": {... 1 key},
+        "list": [... 1 item]
+    },
+    ... 2 more keys
+}"""
+    assert logger.format_json_preview(["abcde"])[0] == '[\n    "abc" ... (2 more characters)\n]'
+
+
+def test_json_preview_max_lines():
+    logger = Logger(json_preview_max_lines=9)
+    preview, truncated = logger.format_json_preview({"a": [{"b": [1] * 3}] * 10, "c": 1})
+    assert truncated
+    assert preview == """{
+    "a": [
+        {
+            "b": [
+                1,
+                ... 2 more items
+            ]
+        },
+        ... 9 more items
+    ],
+    ... 1 more key
+}
+(preview limited to 9 lines)"""
+
+    # the size of the preview of a nested document is bounded by the number of lines, not by the per-level limits
+    data = [[[[list(range(10))] * 10] * 10] * 10] * 10
+    preview, truncated = Logger(json_preview_max_depth=10).format_json_preview(data)
+    assert truncated
+    assert len(preview.splitlines()) <= 200 + 5 + 1
+
+
+def test_response_body_json_preview(lcc_mock, tmp_path):
+    lcc_mock.prepare_attachment.return_value.__enter__.return_value = str(tmp_path / "body")
+    session = body_session(json=list(range(1000)))
+    session.logger.json_preview = True
+    session.logger.json_preview_max_items = 1
+    session.logger.json_preview_attachment = True
+    session.get("http://www.example.net")
+    assert_logs(
+        lcc_mock,
+        r"^HTTP response body \(application/json, \d+ bytes, truncated\):\n\[\n    0,\n    \.\.\. 999 more items\n\]$"
+    )
+    lcc_mock.prepare_attachment.assert_called_once_with("body.json", "HTTP response body")
+    assert json.loads((tmp_path / "body").read_text()) == list(range(1000))
+
+
+def test_response_body_json_preview_not_truncated(lcc_mock):
+    session = body_session(json={"foo": "bar"})
+    session.logger.json_preview = True
+    session.logger.json_preview_attachment = True
+    session.logger.max_inlined_body_size = 5
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, r'^HTTP response body \(application/json\):\n\{\n    "foo": "bar"\n\}$')
+    lcc_mock.prepare_attachment.assert_not_called()
+
+
+def test_json_body_saved_as_attachment(lcc_mock, tmp_path):
+    lcc_mock.prepare_attachment.return_value.__enter__.return_value = str(tmp_path / "body")
+    session = mock_session(json={"foo": "bar" * 10})
+    session.logger = Logger.no_headers()
+    session.logger.max_inlined_body_size = 10
+    session.get("http://www.example.net")
+    lcc_mock.prepare_attachment.assert_called_once_with("body.json", "HTTP response body")
+    assert json.loads((tmp_path / "body").read_text()) == {"foo": "bar" * 10}
+
+
+def test_binary_body_saved_as_raw_attachment(lcc_mock, tmp_path):
+    lcc_mock.prepare_attachment.return_value.__enter__.return_value = str(tmp_path / "body")
+    data = bytes(range(256)) * 4
+    session = mock_session(headers={"Content-Type": "image/png"}, content=data)
+    session.logger = Logger.no_headers()
+    session.logger.max_inlined_body_size = 10
+    session.get("http://www.example.net")
+    lcc_mock.prepare_attachment.assert_called_once_with("body.png", "HTTP response body")
+    assert (tmp_path / "body").read_bytes() == data
+
+
+def test_body_attachment_in_session_map(lcc_mock, tmp_path):
+    lcc_mock.prepare_attachment.return_value.__enter__.return_value = str(tmp_path / "body")
+    session = mock_session(text="B" * 20)
+    session.logger = Logger.no_headers()
+    session.logger.max_inlined_body_size = 10
+    session.map(["http://www.example.net"])
+    lcc_mock.prepare_attachment.assert_called_once_with("body.txt", "HTTP response body")
+    assert (tmp_path / "body").read_text() == "B" * 20
 
 
 def test_max_inlined_body_size_and_debug(lcc_mock):
@@ -426,6 +698,1215 @@ def test_request(lcc_mock):
     assert_logs(lcc_mock, rf".+GET http://www\.example\.net")
 
 
+class RecordingLogger(Logger):
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+
+    def log_request(self, request, prepared_request, hint):
+        self.urls.append(prepared_request.url)
+
+    def log_response(self, resp, hint):
+        self.urls.append(resp.url)
+
+
+def test_session_shared_between_threads(http_server):
+    session = Session(base_url=http_server)
+    errors = []
+
+    def worker(n):
+        logger = RecordingLogger()
+        try:
+            for i in range(20):
+                path = f"/thread/{n}/{i}"
+                resp = session.get(path, params={"i": i}, logger=logger)
+                assert resp.json() == {"path": f"{path}?i={i}"}
+                assert resp.orig_request.url == http_server + path
+                assert resp.orig_request.params == {"i": i}
+            assert logger.urls == [
+                f"{http_server}/thread/{n}/{i}?i={i}" for i in range(20) for _ in range(2)
+            ]
+            assert session.logger is not logger
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    session.close()
+
+    assert errors == []
+
+
+def test_session_map(lcc_mock, http_server):
+    session = Session(base_url=http_server, logger=Logger.off())
+    session.logger.request_line_logging = True
+    session.logger.response_code_logging = True
+    specs = [f"/items/{i}" for i in range(30)] + [{"method": "GET", "url": "/items/30", "params": {"foo": "bar"}}]
+    responses = session.map(specs, max_workers=8)
+    assert [resp.json()["path"] for resp in responses] == [f"/items/{i}" for i in range(30)] + ["/items/30?foo=bar"]
+
+    logged = [c.args[0] for c in lcc_mock.log_info.mock_calls]
+    assert len(logged) == 62
+    for i, (req_log, resp_log) in enumerate(zip(logged[::2], logged[1::2])):
+        assert f"/items/{i}" in req_log
+        assert "HTTP response" in resp_log
+
+
+def test_session_map_error(lcc_mock):
+    session = mock_session(json={})
+    session.logger.request_line_logging = True
+    with pytest.raises(requests.exceptions.InvalidSchema):
+        session.map(["http://www.example.net/1", "foo://www.example.net/2", "http://www.example.net/3"])
+    assert_logs(lcc_mock, r".+/1", r".+/2", r".+/3")
+
+
+def test_async_session(lcc_mock, http_server):
+    pytest.importorskip("httpx")
+
+    async def run():
+        async with AsyncSession(base_url=http_server, hint="async") as session:
+            return await session.post("/items", json={"foo": "bar"})
+
+    resp = asyncio.run(run())
+    assert isinstance(resp, Response)
+    assert resp.status_code == 201
+    assert resp.json() == {"path": "/items", "body": '{"foo": "bar"}'}
+    assert resp.orig_request.json == {"foo": "bar"}
+    assert_logs(
+        lcc_mock,
+        rf"HTTP request \(async\).+POST {http_server}/items",
+        "HTTP request headers",
+        "HTTP request body.+foo.+bar",
+        r"HTTP response \(async\).+201",
+        "HTTP response headers",
+        "HTTP response body.+/items"
+    )
+
+
+def test_async_session_hooks(http_server):
+    pytest.importorskip("httpx")
+    hooked = []
+
+    async def run():
+        async with AsyncSession(base_url=http_server, logger=Logger.off()) as session:
+            return await session.get("/foo", hooks={"response": hooked.append})
+
+    resp = asyncio.run(run())
+    assert hooked == [resp]
+
+
+@pytest.mark.parametrize("kwargs", (
+    {"verify": False}, {"cert": "client.pem"}, {"proxies": {"http": "http://proxy"}}, {"stream": True}
+))
+def test_async_session_unsupported_arguments(http_server, kwargs):
+    pytest.importorskip("httpx")
+
+    async def run():
+        async with AsyncSession(base_url=http_server, logger=Logger.off()) as session:
+            return await session.get("/foo", **kwargs)
+
+    with pytest.raises(TypeError, match="AsyncSession does not support"):
+        asyncio.run(run())
+
+
+def test_async_session_concurrent_requests(lcc_mock, http_server):
+    pytest.importorskip("httpx")
+
+    async def run():
+        async with AsyncSession(base_url=http_server, logger=Logger.off()) as session:
+            session.logger.request_line_logging = True
+            session.logger.response_body_logging = True
+            return await asyncio.gather(*(session.get(f"/items/{i}") for i in range(50)))
+
+    responses = asyncio.run(run())
+    assert [resp.json()["path"] for resp in responses] == [f"/items/{i}" for i in range(50)]
+
+    # each request line must be directly followed by its own response body
+    logged = [c.args[0] for c in lcc_mock.log_info.mock_calls]
+    assert len(logged) == 100
+    for req_log, resp_log in zip(logged[::2], logged[1::2]):
+        path = re.search(r"(/items/\d+)", req_log).group(1)
+        assert f'"{path}"' in resp_log
+
+
+def test_async_session_response_checks(http_server):
+    pytest.importorskip("httpx")
+
+    async def run():
+        async with AsyncSession(base_url=http_server, logger=Logger.off()) as session:
+            return await session.get("/foo", params={"bar": "baz"})
+
+    resp = asyncio.run(run())
+    assert resp.raise_unless_ok() is resp
+    with pytest.raises(StatusCodeMismatch, match=r"expected .+ 204, .+ 200"):
+        resp.raise_unless_status_code(204)
+    with patch("lemoncheesecake.matching.operations.log_check") as log_check_mock:
+        resp.check_ok().check_json({"path": equal_to("/foo?bar=baz")})
+        log_check_mock.assert_called_with(callee.Contains("/foo?bar=baz"), True, callee.Any())
+
+
+def streaming_session(http_server, **logger_kwargs):
+    return Session(
+        base_url=http_server,
+        logger=Logger(
+            request_line_logging=False, request_headers_logging=False, request_body_logging=False,
+            response_code_logging=False, response_headers_logging=False, **logger_kwargs
+        )
+    )
+
+
+def test_streamed_response_body_preview(lcc_mock, http_server):
+    session = streaming_session(http_server, streamed_body_preview_size=10)
+    resp = session.get("/bytes/1000000", stream=True)
+    assert_logs(lcc_mock)
+    assert resp._content is False  # the body has not been read by the logger
+
+    assert sum(len(chunk) for chunk in resp.iter_content(8192)) == 1000000
+    assert_logs(lcc_mock, r"HTTP response body \(streamed, 1000000 bytes, first 10 bytes shown\):\nx{10}$")
+    assert len(resp._body_recorder.preview) == 10
+
+
+def test_streamed_response_body_iter_lines(lcc_mock, http_server):
+    session = streaming_session(http_server)
+    resp = session.get("/bytes/100", stream=True)
+    assert list(resp.iter_lines(decode_unicode=True)) == ["x" * 100]
+    assert_logs(lcc_mock, r"HTTP response body \(streamed, 100 bytes\):\nx{100}$")
+
+
+def test_streamed_response_body_closed_early(lcc_mock, http_server):
+    session = streaming_session(http_server, streamed_body_preview_size=10)
+    with session.get("/bytes/1000000", stream=True) as resp:
+        next(resp.iter_content(100))
+    assert_logs(lcc_mock, r"HTTP response body \(streamed, 100 bytes consumed before the response was closed")
+
+
+def test_streamed_response_body_not_consumed(lcc_mock, http_server):
+    session = streaming_session(http_server)
+    session.get("/bytes/100", stream=True).close()
+    assert_logs(lcc_mock, r"HTTP response body:\n  > <stream not consumed>")
+
+
+def test_streamed_response_body_attachment(lcc_mock, http_server, tmp_path):
+    lcc_mock.prepare_attachment.return_value.__enter__.return_value = str(tmp_path / "body")
+    session = streaming_session(http_server, streamed_body_preview_size=10, streamed_body_attachment=True)
+    resp = session.get("/bytes/200000", stream=True)
+    assert len(resp.content) == 200000
+    assert (tmp_path / "body").read_bytes() == b"x" * 200000
+    lcc_mock.prepare_attachment.assert_called_once_with("body.txt", "HTTP response body")
+    lcc_mock.prepare_attachment.return_value.__exit__.assert_called_once()
+
+
+def test_deferred_logging_success(lcc_mock):
+    session = mock_session(Session(logger=Logger.deferred(), hint="hint"), json={"foo": "bar"})
+    with patch("lemoncheesecake.matching.operations.log_check"):
+        session.get("http://www.example.net/foo").check_ok().check_json({"foo": equal_to("bar")})
+    assert_logs(lcc_mock, r"^HTTP request \(hint\): GET http://www\.example\.net/foo => 200 \(\d+\.\d+s\)$")
+
+
+@pytest.mark.parametrize("action,raises", (
+    (lambda r: r.check_status_code(201), None),
+    (lambda r: r.require_status_code(201), AbortTest),
+    (lambda r: r.assert_header("Content-Type", "text/html"), AbortTest),
+    (lambda r: r.check_json({"foo": equal_to("baz")}), None),
+    (lambda r: r.raise_unless_status_code(201), StatusCodeMismatch),
+))
+def test_deferred_logging_flushed_on_failure(lcc_mock, action, raises):
+    session = mock_session(Session(logger=Logger.deferred()), json={"foo": "bar"})
+    session.get("http://www.example.net/1")
+    resp = session.get("http://www.example.net/2")
+    lcc_mock.reset_mock()
+
+    with patch("lemoncheesecake.matching.operations.log_check"):
+        if raises:
+            with pytest.raises(raises):
+                action(resp)
+        else:
+            action(resp)
+
+    logged = [c.args[0] for c in lcc_mock.log_info.mock_calls]
+    assert len(logged) == 10
+    assert re.match(r"HTTP request:\n  > GET http://www\.example\.net/1", logged[0])
+    assert re.match(r"HTTP request:\n  > GET http://www\.example\.net/2", logged[5])
+    assert re.match(r'HTTP response body.+"foo": "bar"', logged[9], re.DOTALL)
+
+
+def test_deferred_logging_buffer_size(lcc_mock):
+    session = mock_session(Session(logger=Logger.deferred(buffer_size=2)))
+    session.logger.request_headers_logging = False
+    session.logger.response_headers_logging = False
+    session.logger.response_body_logging = False
+    for i in range(5):
+        session.get(f"http://www.example.net/{i}")
+    lcc_mock.reset_mock()
+    session.logger.flush()
+    assert_logs(
+        lcc_mock, r".+GET http://www\.example\.net/3$", r"HTTP response", r".+GET http://www\.example\.net/4$", r"HTTP response"
+    )
+
+
+def test_deferred_logging_test_already_failed(lcc_mock, mocker):
+    mocker.patch("lemoncheesecake_requests._is_report_location_failed", return_value=True)
+    session = mock_session(Session(logger=Logger.deferred()))
+    session.logger.request_headers_logging = False
+    session.logger.response_headers_logging = False
+    session.logger.response_body_logging = False
+    session.get("http://www.example.net")
+    assert_logs(lcc_mock, r"HTTP request:\n  > GET", r"HTTP response:")
+
+
+def test_deferred_logging_map(lcc_mock, mocker):
+    # lemoncheesecake only knows the report location of the test thread, not the one of map() worker threads
+    main_thread = threading.get_ident()
+    mocker.patch(
+        "lemoncheesecake.session.Session.get",
+        side_effect=lambda: Mock(cursor=Mock(location="test_a" if threading.get_ident() == main_thread else None))
+    )
+    session = mock_session(Session(logger=Logger.deferred()))
+    session.logger.request_headers_logging = False
+    session.logger.response_headers_logging = False
+    session.logger.response_body_logging = False
+    resp, _ = session.map(["http://www.example.net/1", "http://www.example.net/2"])
+    lcc_mock.reset_mock()
+    with patch("lemoncheesecake.matching.operations.log_check"):
+        resp.check_status_code(201)
+    assert_logs(
+        lcc_mock, r".+GET http://www\.example\.net/1$", r"HTTP response", r".+GET http://www\.example\.net/2$", r"HTTP response"
+    )
+
+
+def test_deferred_logging_per_location(lcc_mock, mocker):
+    get_caller = mocker.patch("lemoncheesecake_requests._get_caller", return_value=("test_a", 1))
+    mocker.patch("lemoncheesecake_requests._is_report_location_failed", return_value=False)
+    session = mock_session(Session(logger=Logger.deferred()))
+    session.logger.request_headers_logging = False
+    session.logger.response_headers_logging = False
+    session.logger.response_body_logging = False
+    session.get("http://www.example.net/a")
+    # a test running in parallel (in another thread) does not discard the deferred requests/responses of test_a
+    get_caller.return_value = ("test_b", 2)
+    session.get("http://www.example.net/b")
+    get_caller.return_value = ("test_a", 1)
+    lcc_mock.reset_mock()
+    session.logger.flush()
+    assert_logs(lcc_mock, r".+GET http://www\.example\.net/a$", r"HTTP response")
+    get_caller.return_value = ("test_b", 2)
+    lcc_mock.reset_mock()
+    session.logger.flush()
+    assert_logs(lcc_mock, r".+GET http://www\.example\.net/b$", r"HTTP response")
+
+
+def test_deferred_logging_released_after_passing_test(lcc_mock, mocker):
+    get_caller = mocker.patch("lemoncheesecake_requests._get_caller", return_value=("test_a", 1))
+    mocker.patch("lemoncheesecake_requests._is_report_location_failed", return_value=False)
+    session = mock_session(Session(logger=Logger.deferred()))
+    resp = weakref.ref(session.get("http://www.example.net/a"))
+    gc.collect()
+    assert resp() is not None
+    # the thread of test_a moves on to test_b: test_a has passed, its requests/responses are released
+    get_caller.return_value = ("test_b", 1)
+    session.get("http://www.example.net/b")
+    gc.collect()
+    assert resp() is None
+    assert list(session.logger._deferred_exchanges) == ["test_b"]
+
+
+def background_session(**kwargs):
+    session = mock_session(Session(logger=Logger.background()), **kwargs)
+    session.logger.request_headers_logging = False
+    session.logger.response_headers_logging = False
+    return session
+
+
+def test_background_logging(lcc_mock):
+    threads = []
+    lcc_mock.log_info.side_effect = lambda content: threads.append(threading.get_ident())
+    session = background_session(json={"foo": "bar"})
+    with session.logger.background_scope():
+        session.get("http://www.example.net/1")
+        session.get("http://www.example.net/2")
+        assert lcc_mock.log_info.call_count < 6
+    assert_logs(
+        lcc_mock,
+        r"HTTP request:\n  > GET http://www\.example\.net/1", r"HTTP response:", r"HTTP response body",
+        r"HTTP request:\n  > GET http://www\.example\.net/2", r"HTTP response:", r"HTTP response body"
+    )
+    # the logs are formatted in background but written by the test thread
+    assert set(threads) == {threading.get_ident()}
+
+
+def test_background_logging_before_check(lcc_mock):
+    events = []
+    lcc_mock.log_info.side_effect = lambda content: events.append(content.splitlines()[0])
+    session = background_session(json={"foo": "bar"})
+    with patch("lemoncheesecake.matching.operations.log_check", side_effect=lambda *args: events.append("check")):
+        with session.logger.background_scope():
+            session.get("http://www.example.net").check_ok()
+    assert events == ["HTTP request:", "HTTP response:", "HTTP response body (application/json):", "check"]
+
+
+def test_background_logging_buffered(lcc_mock):
+    session = background_session(text="foo")
+    with session.logger.background_scope():
+        session.map(["http://www.example.net/1", "http://www.example.net/2"])
+    # concurrent requests logs are formatted in place and written by map()
+    assert lcc_mock.log_info.call_count == 6
+
+
+def test_background_logging_outside_of_scope(lcc_mock, mocker):
+    submit = mocker.spy(_background_worker, "submit")
+    session = background_session(text="foo")
+    # without a background scope (whose exit writes the pending logs), nothing is left pending at the end of the test
+    session.get("http://www.example.net")
+    assert lcc_mock.log_info.call_count == 3
+    submit.assert_not_called()
+
+
+def test_background_scope_of_another_test(lcc_mock, mocker):
+    get_report_location = mocker.patch("lemoncheesecake_requests._get_report_location", return_value="test_a")
+    submit = mocker.spy(_background_worker, "submit")
+    session = background_session(text="foo")
+    with session.logger.background_scope():
+        get_report_location.return_value = "test_b"
+        session.get("http://www.example.net")
+        assert lcc_mock.log_info.call_count == 3
+    submit.assert_not_called()
+
+
+def test_background_scope_exit_on_exception(lcc_mock):
+    session = background_session(text="foo")
+    with pytest.raises(ZeroDivisionError):
+        with session.logger.background_scope():
+            session.get("http://www.example.net")
+            1 / 0
+    assert lcc_mock.log_info.call_count == 3
+
+
+def test_timings(http_server):
+    session = Session(base_url=http_server, logger=Logger.off())
+    resp = session.get("/first")
+    assert isinstance(resp.timings, Timings)
+    assert resp.timings.connection_reused is False
+    # the DNS resolution is part of the connection setup performed by urllib3
+    assert resp.timings.dns is None and resp.timings.connect >= 0
+    assert resp.timings.tls is None
+    assert resp.timings.ttfb >= 0 and resp.timings.transfer >= 0
+
+    resp = session.get("/second")
+    assert resp.timings.connection_reused is True
+    assert resp.timings.dns is None and resp.timings.connect is None
+    assert resp.timings.ttfb >= 0 and resp.timings.transfer >= 0
+
+
+def test_timings_dns(http_server):
+    session = Session(base_url=http_server, logger=Logger.off(), dns_timings=True)
+    resp = session.get("/first")
+    assert resp.timings.dns >= 0 and resp.timings.connect >= 0
+    assert session.get("/second").timings.dns is None
+
+
+def test_timings_dns_fallback_to_next_address(http_server, mocker):
+    port = int(http_server.rsplit(":", 1)[1])
+    getaddrinfo = socket.getaddrinfo
+    resolved = []
+
+    def fake_getaddrinfo(host, *args):
+        if host != "api.test":
+            return getaddrinfo(host, *args)
+        resolved.append(host)
+        # the first address is not reachable, the connection falls back to the next one like urllib3 does
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.2", 1)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port)),
+        ]
+
+    mocker.patch("socket.getaddrinfo", side_effect=fake_getaddrinfo)
+    session = Session(base_url=f"http://api.test:{port}", logger=Logger.off(), dns_timings=True)
+    resp = session.get("/foo")
+    assert resp.status_code == 200
+    assert resp.timings.dns is not None
+    # the host has been resolved only once
+    assert resolved == ["api.test"]
+
+
+def test_timings_dns_not_resolved(mocker):
+    mocker.patch("socket.getaddrinfo", side_effect=socket.gaierror("boom"))
+    session = Session(logger=Logger.off(), dns_timings=True)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get("http://www.example.invalid")
+
+
+def test_timings_streamed(http_server):
+    session = Session(base_url=http_server, logger=Logger.off())
+    resp = session.get("/bytes/10", stream=True)
+    assert resp.timings.ttfb >= 0
+    assert resp.timings.transfer is None
+    resp.close()
+
+
+def test_timings_not_available(lcc_mock):
+    session = mock_session()
+    resp = session.get("http://www.example.net")
+    assert resp.timings is None
+
+
+def test_pool_options():
+    session = Session(pool_connections=5, pool_maxsize=20, pool_block=True)
+    adapter = session.get_adapter("http://www.example.net")
+    assert adapter._pool_connections == 5
+    assert adapter._pool_maxsize == 20
+    assert adapter._pool_block is True
+
+
+def test_pool_hits_and_misses(http_server):
+    session = Session(base_url=http_server, logger=Logger.off())
+    session.get("/foo")
+    session.get("/foo")
+    session.get("/foo")
+    assert (session.pool_misses, session.pool_hits) == (1, 2)
+
+
+def test_warmup(http_server):
+    session = Session(base_url=http_server, logger=Logger.off(), pool_maxsize=4)
+    assert session.warmup(3) == 3
+    assert session.warmup(3) == 0
+    assert session.warmup(10) == 1
+
+    results = session.map(["/foo"] * 4, max_workers=4)
+    assert all(resp.timings.connection_reused for resp in results)
+    assert (session.pool_misses, session.pool_hits) == (0, 4)
+
+
+def test_warmup_cassette_replay(tmp_path):
+    with Cassette(str(tmp_path / "cassette.db"), "replay") as cassette:
+        session = Session(base_url="http://www.example.net", cassette=cassette)
+        assert session.warmup(2) == 0
+
+
+def test_timings_str():
+    timings = Timings()
+    timings.ttfb = 0.0123
+    timings.transfer = 0.001
+    timings.connection_reused = True
+    assert str(timings) == "TTFB 0.012s, transfer 0.001s (reused connection)"
+
+
+def test_timings_logging(lcc_mock, http_server):
+    logger = Logger(timings_logging=True)
+    logger.request_headers_logging = False
+    logger.response_headers_logging = False
+    logger.response_body_logging = False
+    session = Session(base_url=http_server, logger=logger, dns_timings=True)
+    session.get("/foo")
+    assert_logs(
+        lcc_mock,
+        r"HTTP request:\n  > GET",
+        r"HTTP response:\n  > Status: 200\n  > Duration: \d+\.\d+s\n"
+        r"  > Timings: DNS \d+\.\d+s, connect \d+\.\d+s, TTFB \d+\.\d+s, transfer \d+\.\d+s \(new connection\)$"
+    )
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for i in range(1, 1001):
+        histogram.record(i / 1000)
+    assert histogram.count == 1000
+    assert histogram.max == 1.0
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.02)
+    assert histogram.percentile(90) == pytest.approx(0.9, rel=0.02)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.02)
+    assert histogram.percentile(100) == 1.0
+
+
+def test_latency_histogram_empty():
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_latency_histogram_merge():
+    histogram_1, histogram_2 = LatencyHistogram(), LatencyHistogram()
+    for i in range(1, 501):
+        histogram_1.record(i / 1000)
+        histogram_2.record((i + 500) / 1000)
+    histogram_1.merge(histogram_2)
+    assert histogram_1.count == 1000
+    assert histogram_1.max == 1.0
+    assert histogram_1.percentile(90) == pytest.approx(0.9, rel=0.02)
+
+
+@pytest.mark.parametrize("url,expected", (
+    ("http://www.example.net/users/42", "/users/{id}"),
+    ("http://www.example.net/users/42/posts/7?page=2", "/users/{id}/posts/{id}"),
+    ("http://www.example.net/items/123e4567-e89b-12d3-a456-426614174000", "/items/{id}"),
+    ("http://www.example.net/commits/0123456789abcdef0123", "/commits/{id}"),
+    ("http://www.example.net/v2/users", "/v2/users"),
+    ("http://www.example.net", "/"),
+))
+def test_latency_stats_url_template(url, expected):
+    assert LatencyStats.url_template(url) == expected
+
+
+def test_latency_stats_session():
+    stats = LatencyStats()
+    session = mock_session(Session(logger=Logger.off(), latency_stats=stats))
+    for i in range(10):
+        session.get(f"http://www.example.net/users/{i}")
+    session.post("http://www.example.net/users")
+
+    report = stats.report()
+    assert [(entry["method"], entry["url"], entry["count"]) for entry in report] == [
+        ("POST", "/users", 1), ("GET", "/users/{id}", 10)
+    ]
+    assert set(report[0]) == {"method", "url", "count", "mean", "p50", "p90", "p99", "max"}
+    assert stats.get_histogram("get", "/users/{id}").count == 10
+
+
+def test_latency_stats_merge():
+    stats_1, stats_2 = LatencyStats(), LatencyStats()
+    stats_1.record("GET", "http://www.example.net/users/1", 0.1)
+    stats_2.record("GET", "http://www.example.net/users/2", 0.2)
+    stats_2.record("DELETE", "http://www.example.net/users/2", 0.3)
+    stats_1.merge(stats_2)
+    assert stats_1.get_histogram("GET", "/users/{id}").count == 2
+    assert stats_1.get_histogram("DELETE", "/users/{id}").count == 1
+    stats_2.record("DELETE", "http://www.example.net/users/2", 0.3)
+    assert stats_1.get_histogram("DELETE", "/users/{id}").count == 1
+
+
+def test_latency_stats_save_report(lcc_mock, tmp_path):
+    stats = LatencyStats()
+    stats.record("GET", "http://www.example.net/users/1", 0.1)
+    stats.save_report()
+    (table, table_filename, _), (content, json_filename, _) = [c.args for c in lcc_mock.save_attachment_content.mock_calls]
+    assert table_filename == "latency_stats.txt"
+    assert re.match(r"Method\s+URL\s+Count\s+Mean\s+P50\s+P90\s+P99\s+Max\nGET\s+/users/\{id\}\s+1\s+0\.100s", table)
+    assert json_filename == "latency_stats.json"
+    assert json.loads(content)[0]["count"] == 1
+
+    stats.save(str(tmp_path / "stats.json"))
+    assert json.loads((tmp_path / "stats.json").read_text()) == json.loads(content)
+
+
+def test_latency_stats_async_session(http_server):
+    stats = LatencyStats()
+
+    async def run():
+        async with AsyncSession(base_url=http_server, logger=Logger.off(), latency_stats=stats) as session:
+            await asyncio.gather(*(session.get(f"/items/{i}") for i in range(5)))
+
+    asyncio.run(run())
+    assert stats.get_histogram("GET", "/items/{id}").count == 5
+
+
+def test_load(lcc_mock, http_server):
+    session = Session(base_url=http_server)
+    result = session.load(["/foo", {"method": "POST", "url": "/bar", "json": {}}, "/bytes/10"], duration=0.3, concurrency=4)
+    assert result.requests > 0
+    assert result.errors == 0
+    assert set(result.status_codes) == {200, 201}
+    assert result.duration >= 0.3
+    assert result.throughput == result.requests / result.duration
+    assert result.histogram.count == result.requests
+    assert 0 < result.percentile(50) <= result.percentile(99) <= result.histogram.max
+    lcc_mock.log_info.assert_not_called()
+
+
+def test_load_rate(http_server):
+    session = Session(base_url=http_server, logger=Logger.off())
+    result = session.load(["/foo"], duration=0.5, rate=20, concurrency=2)
+    assert result.requests == 10
+
+
+def test_load_log_every(lcc_mock, http_server):
+    session = Session(base_url=http_server)
+    session.logger.request_headers_logging = False
+    session.logger.response_headers_logging = False
+    session.logger.response_body_logging = False
+    result = session.load([f"/foo/{i}" for i in range(10)], duration=0.5, rate=20, concurrency=2, log_every=5)
+    assert result.requests == 10
+    assert_logs(
+        lcc_mock, r".+GET http://.+/foo/0$", r"HTTP response", r".+GET http://.+/foo/5$", r"HTTP response"
+    )
+
+
+def test_load_errors():
+    session = mock_session(status_code=500)
+    result = session.load(["http://www.example.net", "foo://bar"], duration=0.1, concurrency=1)
+    assert result.errors == result.requests
+    assert result.error_rate == 1.0
+    assert set(result.status_codes) == {500}
+    assert set(result.exceptions) == {"InvalidSchema"}
+    assert result.histogram.count == result.status_codes[500]
+
+
+def test_load_no_specs():
+    with pytest.raises(ValueError):
+        Session().load([], duration=1)
+
+
+def test_load_with_processes(lcc_mock, http_server):
+    result = load_with_processes(
+        functools.partial(Session, base_url=http_server), ["/foo", "/bytes/10"], duration=0.5,
+        processes=2, concurrency=2, rate=40
+    )
+    assert result.requests == 20
+    assert result.errors == 0
+    assert result.status_codes == {200: 20}
+    assert result.histogram.count == 20
+    content, filename, description = lcc_mock.save_attachment_content.call_args.args
+    assert filename == "load_results.txt"
+    assert description == "Load test results (2 processes)"
+    assert content.startswith("Requests: 20 ")
+
+
+def test_load_with_processes_no_report(lcc_mock, http_server):
+    result = load_with_processes(
+        functools.partial(Session, base_url=http_server), ["/foo"], duration=0.2, processes=2, save_report=False
+    )
+    assert result.requests > 0
+    lcc_mock.save_attachment_content.assert_not_called()
+
+
+def test_load_result_check():
+    result = LoadResult()
+    for i in range(1, 101):
+        result.record(i / 1000, status_code=200 if i % 10 else 500)
+    result.duration = 2.0
+    assert result.as_dict() == {
+        "requests": 100, "errors": 10, "duration": 2.0, "throughput": 50.0, "error_rate": 0.1,
+        "p50": pytest.approx(0.05, rel=0.02), "p90": pytest.approx(0.09, rel=0.02),
+        "p99": pytest.approx(0.099, rel=0.02), "max": 0.1
+    }
+    with patch("lemoncheesecake.matching.operations.log_check") as log_check_mock:
+        result.check({"throughput": greater_than(10), "p99": less_than(0.05)})
+    assert [c.args[1] for c in log_check_mock.mock_calls] == [True, False]
+
+
+def test_load_result_merge_and_report(lcc_mock):
+    result_1, result_2 = LoadResult(), LoadResult()
+    result_1.record(0.1, status_code=200)
+    result_1.duration = 1.0
+    result_2.record(None, exception=ValueError())
+    result_2.duration = 2.0
+    result_1.merge(result_2)
+    assert (result_1.requests, result_1.errors, result_1.duration) == (2, 1, 2.0)
+
+    result_1.save_report()
+    content, filename, _ = lcc_mock.save_attachment_content.call_args.args
+    assert filename == "load_results.txt"
+    assert content == (
+        "Requests: 2 (1.0 req/s over 2.000s)\n"
+        "Errors: 1 (50.00%)\n"
+        "Latency: p50 0.100s, p90 0.100s, p99 0.100s, max 0.100s\n"
+        "Status codes: 200 x 1\n"
+        "Exceptions: ValueError x 1"
+    )
+
+
+def retry_session(responses, retry=None, logger=None):
+    session = Session(logger=logger or Logger.off(), retry=retry or RetryPolicy(jitter=False))
+    adapter = requests_mock.Adapter()
+    adapter.register_uri(requests_mock.ANY, requests_mock.ANY, responses)
+    session.mount("http://", adapter)
+    return session
+
+
+@pytest.fixture
+def sleep_mock(mocker):
+    return mocker.patch("lemoncheesecake_requests.time.sleep")
+
+
+def test_retry_success_after_failures(sleep_mock):
+    session = retry_session([{"status_code": 503}, {"status_code": 502}, {"status_code": 200}])
+    resp = session.get("http://www.example.net")
+    assert resp.status_code == 200
+    assert [attempt.response.status_code for attempt in resp.attempts] == [503, 502, 200]
+    assert [attempt.delay for attempt in resp.attempts] == [0.5, 1.0, None]
+    assert resp.attempts[-1].response is resp
+    assert [c.args[0] for c in sleep_mock.mock_calls] == [0.5, 1.0]
+
+
+def test_retry_exhausted(sleep_mock):
+    session = retry_session([{"status_code": 503}], retry=RetryPolicy(total=2, jitter=False))
+    resp = session.get("http://www.example.net")
+    assert resp.status_code == 503
+    assert len(resp.attempts) == 3
+    with pytest.raises(StatusCodeMismatch, match=re.compile(
+        r"Attempts:\n  #1: GET http://www\.example\.net/ => 503 \(\d+\.\d+s\), retried after 0\.500s\n"
+        r"  #2: .+ => 503 .+ retried after 1\.000s\n  #3: .+ => 503 \(\d+\.\d+s\)\n\n"
+    )):
+        resp.raise_unless_ok()
+
+
+def test_retry_non_idempotent_method(sleep_mock):
+    session = retry_session([{"status_code": 503}, {"status_code": 200}])
+    resp = session.post("http://www.example.net")
+    assert resp.status_code == 503
+    assert len(resp.attempts) == 1
+    sleep_mock.assert_not_called()
+
+
+def test_retry_status_code_not_retried(sleep_mock):
+    session = retry_session([{"status_code": 500}, {"status_code": 200}])
+    assert session.get("http://www.example.net").status_code == 500
+
+
+def test_retry_exception(sleep_mock):
+    session = retry_session([{"exc": requests.exceptions.ConnectionError("reset")}, {"status_code": 200}])
+    resp = session.get("http://www.example.net")
+    assert resp.status_code == 200
+    assert isinstance(resp.attempts[0].exception, requests.exceptions.ConnectionError)
+    assert resp.attempts[0].response is None
+
+
+def test_retry_exception_exhausted(sleep_mock):
+    session = retry_session(
+        [{"exc": requests.exceptions.ConnectionError("reset")}], retry=RetryPolicy(total=1, jitter=False)
+    )
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get("http://www.example.net")
+    assert sleep_mock.call_count == 1
+
+
+@pytest.mark.parametrize("retry_after,expected", (("2", 2.0), ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0)))
+def test_retry_after(sleep_mock, retry_after, expected):
+    session = retry_session([{"status_code": 503, "headers": {"Retry-After": retry_after}}, {"status_code": 200}])
+    session.get("http://www.example.net")
+    sleep_mock.assert_called_once_with(expected)
+
+
+def test_retry_after_too_long(sleep_mock):
+    session = retry_session(
+        [{"status_code": 503, "headers": {"Retry-After": "3600"}}, {"status_code": 200}],
+        retry=RetryPolicy(max_retry_after=10)
+    )
+    assert session.get("http://www.example.net").status_code == 503
+    sleep_mock.assert_not_called()
+
+
+def test_retry_budget(sleep_mock):
+    session = retry_session(
+        [{"status_code": 503}, {"status_code": 200}], retry=RetryPolicy(backoff_factor=5, budget=2, jitter=False)
+    )
+    assert session.get("http://www.example.net").status_code == 503
+    sleep_mock.assert_not_called()
+
+
+def test_retry_jitter(sleep_mock):
+    session = retry_session([{"status_code": 503}, {"status_code": 200}], retry=RetryPolicy(backoff_factor=1))
+    session.get("http://www.example.net")
+    assert 0 <= sleep_mock.call_args.args[0] <= 1
+
+
+def test_retry_logging(lcc_mock, sleep_mock):
+    logger = Logger.on()
+    logger.request_headers_logging = False
+    logger.response_headers_logging = False
+    session = retry_session([{"status_code": 503, "text": "unavailable"}, {"status_code": 200, "text": "ok"}], logger=logger)
+    session.hint = "hint"
+    session.get("http://www.example.net")
+    assert_logs(
+        lcc_mock,
+        r"^HTTP request \(hint\): GET http://www\.example\.net/ => 503 \(\d+\.\d+s\), retried after 0\.500s$",
+        r"^HTTP request \(hint, attempt 2\):\n  > GET http://www\.example\.net/$",
+        r"^HTTP response \(hint, attempt 2\):\n  > Status: 200",
+        r"^HTTP response body.+ok",
+    )
+
+
+def test_retry_within_map(lcc_mock, sleep_mock):
+    session = retry_session([{"status_code": 503}, {"status_code": 200}], logger=Logger.on())
+    responses = session.map(["http://www.example.net"])
+    assert responses[0].status_code == 200
+    assert lcc_mock.log_info.call_count > 0
+
+
+def cache_session(responses, cache=None, logger=None):
+    session = Session(logger=logger or Logger.off(), cache=cache or HttpCache())
+    adapter = requests_mock.Adapter()
+    adapter.register_uri(requests_mock.ANY, requests_mock.ANY, responses)
+    session.mount("http://", adapter)
+    return session, adapter
+
+
+def test_cache_fresh_entry():
+    session, adapter = cache_session([{"json": {"n": 1}, "headers": {"Cache-Control": "max-age=60"}}])
+    resp_1 = session.get("http://www.example.net/data")
+    resp_2 = session.get("http://www.example.net/data")
+    assert adapter.call_count == 1
+    assert resp_1.cache_status is None and not resp_1.from_cache
+    assert resp_2.cache_status == "hit" and resp_2.from_cache
+    assert isinstance(resp_2, Response)
+    assert resp_2.json() == {"n": 1}
+    assert (session.cache.hits, session.cache.misses) == (1, 1)
+    with patch("lemoncheesecake.matching.operations.log_check"):
+        resp_2.check_ok().check_json({"n": equal_to(1)})
+
+
+def test_cache_stale_entry_revalidated():
+    session, adapter = cache_session([
+        {"json": {"n": 1}, "headers": {"ETag": '"v1"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}},
+        {"status_code": 304, "headers": {"ETag": '"v1"', "Cache-Control": "max-age=60"}},
+    ])
+    session.get("http://www.example.net/data")
+    resp = session.get("http://www.example.net/data")
+    assert adapter.call_count == 2
+    assert adapter.last_request.headers["If-None-Match"] == '"v1"'
+    assert adapter.last_request.headers["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert resp.status_code == 200
+    assert resp.cache_status == "revalidated"
+    assert resp.json() == {"n": 1}
+
+    # the revalidation made the entry fresh
+    assert session.get("http://www.example.net/data").cache_status == "hit"
+    assert adapter.call_count == 2
+
+
+def test_cache_stale_entry_modified():
+    session, adapter = cache_session([
+        {"json": {"n": 1}, "headers": {"ETag": '"v1"'}},
+        {"json": {"n": 2}, "headers": {"ETag": '"v2"'}},
+        {"status_code": 304},
+    ])
+    session.get("http://www.example.net/data")
+    assert session.get("http://www.example.net/data").json() == {"n": 2}
+    resp = session.get("http://www.example.net/data")
+    assert adapter.last_request.headers["If-None-Match"] == '"v2"'
+    assert resp.json() == {"n": 2}
+
+
+@pytest.mark.parametrize("headers", (
+    {},
+    {"Cache-Control": "no-store, max-age=60"},
+    {"Cache-Control": "max-age=60", "Vary": "*"},
+))
+def test_cache_not_cacheable(headers):
+    session, adapter = cache_session([{"json": {}, "headers": headers}])
+    session.get("http://www.example.net/data")
+    assert not session.get("http://www.example.net/data").from_cache
+    assert adapter.call_count == 2
+
+
+@pytest.mark.parametrize("method,headers", (
+    ("POST", {}),
+    ("GET", {"Cache-Control": "no-store"}),
+    ("GET", {"If-None-Match": '"v1"'}),
+))
+def test_cache_bypassed(method, headers):
+    session, adapter = cache_session([{"json": {}, "headers": {"Cache-Control": "max-age=60"}}])
+    session.request(method, "http://www.example.net/data", headers=headers)
+    session.request(method, "http://www.example.net/data", headers=headers)
+    assert adapter.call_count == 2
+
+
+@pytest.mark.parametrize("cache_control,age,served_from_cache", (
+    ("no-cache", "0", False),
+    ("max-age=0", "0", False),
+    ("max-age = 00", "0", False),
+    ("max-age=05", "0", True),
+    ("max-age=05", "10", False),
+    ("max-age=30", "10", True),
+))
+def test_cache_request_no_cache(cache_control, age, served_from_cache):
+    session, adapter = cache_session([{"json": {}, "headers": {
+        "Cache-Control": "max-age=60", "Age": age, "ETag": '"v1"'
+    }}])
+    session.get("http://www.example.net/data")
+    resp = session.get("http://www.example.net/data", headers={"Cache-Control": cache_control})
+    assert resp.cache_status == ("hit" if served_from_cache else None)
+
+
+def test_cache_expires():
+    session, adapter = cache_session([{"json": {}, "headers": {
+        "Date": "Wed, 21 Oct 2015 07:28:00 GMT", "Expires": "Wed, 21 Oct 2015 07:29:00 GMT"
+    }}])
+    session.get("http://www.example.net/data")
+    assert session.get("http://www.example.net/data").from_cache
+
+
+def test_cache_keyed_on_credentials_and_vary():
+    session, adapter = cache_session([{"json": {}, "headers": {"Cache-Control": "max-age=60", "Vary": "Accept"}}])
+    session.get("http://www.example.net/data", headers={"Authorization": "token a"})
+    assert not session.get("http://www.example.net/data", headers={"Authorization": "token b"}).from_cache
+    assert session.get("http://www.example.net/data", headers={"Authorization": "token b"}).from_cache
+    assert not session.get(
+        "http://www.example.net/data", headers={"Authorization": "token b", "Accept": "text/plain"}
+    ).from_cache
+
+
+def test_cache_lru_eviction():
+    session, adapter = cache_session(
+        [{"json": {}, "headers": {"Cache-Control": "max-age=60"}}], cache=HttpCache(max_entries=2)
+    )
+    for path in "/1", "/2", "/1", "/3":
+        session.get("http://www.example.net" + path)
+    assert adapter.call_count == 3
+    assert session.get("http://www.example.net/1").from_cache
+    assert not session.get("http://www.example.net/2").from_cache
+
+
+def test_cache_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with HttpCache(max_entries=1, path=path) as cache:
+        session, adapter = cache_session([{"json": {"n": 1}, "headers": {"Cache-Control": "max-age=60"}}], cache=cache)
+        session.get("http://www.example.net/1")
+        session.get("http://www.example.net/2")
+        assert session.get("http://www.example.net/1").from_cache
+        assert adapter.call_count == 2
+
+    with HttpCache(path=path) as cache:
+        session, adapter = cache_session([{"json": {}}], cache=cache)
+        resp = session.get("http://www.example.net/2")
+        assert resp.from_cache and resp.json() == {"n": 1}
+        assert adapter.call_count == 0
+        cache.clear()
+        assert not session.get("http://www.example.net/2").from_cache
+
+
+def test_cache_logging(lcc_mock):
+    logger = Logger.on()
+    logger.request_headers_logging = False
+    logger.response_headers_logging = False
+    session, adapter = cache_session([{"text": "foobar", "headers": {"Cache-Control": "max-age=60"}}], logger=logger)
+    session.get("http://www.example.net/data")
+    lcc_mock.reset_mock()
+    session.get("http://www.example.net/data")
+    assert_logs(
+        lcc_mock,
+        r"HTTP request:\n  > GET",
+        r"HTTP response:\n  > Status: 200\n  > Duration: \d+\.\d+s\n  > Cache: hit$",
+        r"^HTTP response body: served from cache \(6 bytes\)$"
+    )
+
+
+def single_flight_session(delay=0.2, logger=None, **kwargs):
+    calls = []
+
+    def callback(request, context):
+        calls.append(request.url)
+        time.sleep(delay)
+        return {"url": request.url}
+
+    session = Session(logger=logger or Logger.off(), single_flight=True)
+    adapter = requests_mock.Adapter()
+    adapter.register_uri(requests_mock.ANY, requests_mock.ANY, json=callback, **kwargs)
+    session.mount("http://", adapter)
+    return session, calls
+
+
+def test_single_flight():
+    session, calls = single_flight_session()
+    responses = session.map(["http://www.example.net/data"] * 5, max_workers=5)
+    assert calls == ["http://www.example.net/data"]
+    assert len(set(map(id, responses))) == 5
+    assert all(resp.json() == {"url": "http://www.example.net/data"} for resp in responses)
+    assert all(isinstance(resp, Response) for resp in responses)
+    assert len({resp.shared_call for resp in responses}) == 1
+    assert sorted(resp.coalesced for resp in responses) == [False, True, True, True, True]
+
+
+def test_single_flight_distinct_requests():
+    session, calls = single_flight_session()
+    session.map([
+        "http://www.example.net/1", "http://www.example.net/2",
+        {"url": "http://www.example.net/1", "headers": {"Authorization": "token"}},
+        {"method": "POST", "url": "http://www.example.net/1"},
+    ], max_workers=4)
+    assert len(calls) == 4
+
+
+def test_single_flight_sequential_requests():
+    session, calls = single_flight_session(delay=0)
+    resp_1 = session.get("http://www.example.net/data")
+    resp_2 = session.get("http://www.example.net/data")
+    assert len(calls) == 2
+    assert resp_1.shared_call is None and resp_2.shared_call is None
+
+
+def test_single_flight_disabled():
+    session, calls = single_flight_session()
+    session.single_flight = False
+    session.map(["http://www.example.net/data"] * 3, max_workers=3)
+    assert len(calls) == 3
+
+
+def test_single_flight_exception():
+    session = Session(logger=Logger.off(), single_flight=True)
+    adapter = requests_mock.Adapter()
+
+    def callback(request, context):
+        time.sleep(0.2)
+        raise requests.exceptions.ConnectionError("reset")
+
+    adapter.register_uri("GET", requests_mock.ANY, json=callback)
+    session.mount("http://", adapter)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.map(["http://www.example.net/data"] * 3, max_workers=3)
+
+
+def test_single_flight_logging(lcc_mock):
+    logger = Logger.on()
+    logger.request_headers_logging = False
+    logger.response_headers_logging = False
+    session, calls = single_flight_session(logger=logger)
+    session.map(["http://www.example.net/data"] * 2, max_workers=2)
+    logs = [c.args[0] for c in lcc_mock.log_info.mock_calls]
+    assert len(logs) == 6
+    assert sorted(log.splitlines()[-1] for log in (logs[1], logs[4])) == [
+        "  > Shared call: #1", "  > Shared call: #1 (coalesced)"
+    ]
+    assert "HTTP response body: see shared call #1 (38 bytes)" in logs
+
+
+@pytest.fixture
+def fake_clock(mocker):
+    # a clock that only advances when sleeping, so that the rate limit delays are deterministic
+    now = [1000.0]
+
+    def sleep(delay):
+        now[0] += delay
+
+    mocker.patch("lemoncheesecake_requests.time.perf_counter", side_effect=lambda: now[0])
+    return mocker.patch("lemoncheesecake_requests.time.sleep", side_effect=sleep)
+
+
+def test_rate_limit_token_bucket(fake_clock):
+    limit = RateLimit(rate=20)
+    waits = [limit.acquire() for _ in range(5)]
+    assert waits == [0.0] + [pytest.approx(0.05)] * 4
+
+
+def test_rate_limit_burst(fake_clock):
+    limit = RateLimit(rate=10, burst=3)
+    assert [limit.acquire() for _ in range(4)] == [0.0, 0.0, 0.0, pytest.approx(0.1)]
+
+
+def test_rate_limit_max_in_flight():
+    limit = RateLimit(max_in_flight=1)
+    assert limit.acquire() < 0.01
+    threading.Timer(0.1, limit.release).start()
+    assert limit.acquire() >= 0.09
+    limit.release()
+
+
+def test_rate_limit_session(http_server):
+    session = Session(base_url=http_server, logger=Logger.off(), limits={http_server: RateLimit(rate=2)})
+    resp_1 = session.get("/foo")
+    resp_2 = session.get("/foo")
+    # the second request waits about 0.5s, the bounds are loose so that a slow machine does not break the test
+    assert resp_1.timings.wait < 0.25
+    assert resp_2.timings.wait > 0.25
+    # the time spent waiting for the limit is not part of the response time
+    assert resp_2.elapsed.total_seconds() < 0.25
+
+
+def test_rate_limit_session_max_in_flight(http_server):
+    limit = RateLimit(max_in_flight=2)
+    session = Session(base_url=http_server, logger=Logger.off(), limits={"127.0.0.1": limit})
+    responses = session.map(["/foo"] * 6, max_workers=6)
+    assert all(resp.timings.wait is not None for resp in responses)
+    # every slot has been released
+    assert limit.acquire() < 0.01 and limit.acquire() < 0.01
+
+
+def test_rate_limit_most_specific_prefix(http_server):
+    session = Session(base_url=http_server, logger=Logger.off(), limits={
+        http_server: RateLimit(rate=1), http_server + "/fast": RateLimit(rate=1000)
+    })
+    session.get("/fast/1")
+    assert session.get("/fast/2").timings.wait < 0.05
+
+
+def test_rate_limit_not_applicable(http_server):
+    session = Session(base_url=http_server, logger=Logger.off(), limits={"www.example.net": RateLimit(rate=1)})
+    assert session.get("/foo").timings.wait is None
+
+
+def test_rate_limit_logging(lcc_mock, http_server):
+    logger = Logger(timings_logging=True)
+    logger.request_headers_logging = False
+    logger.response_headers_logging = False
+    logger.response_body_logging = False
+    session = Session(base_url=http_server, logger=logger, limits={http_server: RateLimit(rate=10)})
+    session.get("/foo")
+    session.get("/foo")
+    assert re.match(
+        r"HTTP response:\n  > Status: 200\n  > Duration: \d+\.\d+s \(after \d+\.\d+s waiting for client-side limits\)\n"
+        r"  > Timings: wait \d+\.\d+s, TTFB",
+        lcc_mock.log_info.call_args.args[0]
+    )
+
+
+def test_cassette_record_and_replay(lcc_mock, http_server, tmp_path):
+    path = str(tmp_path / "cassette.db")
+    with Cassette(path, "record") as cassette:
+        session = Session(base_url=http_server, logger=Logger.off(), cassette=cassette)
+        recorded = [session.get("/foo"), session.post("/bar", json={"a": 1}), session.get("/bytes/10")]
+
+    with Cassette(path) as cassette:
+        # the base URL is the one of the recording, but nothing is listening on that port anymore
+        session = Session(base_url=http_server, logger=Logger.no_headers(), cassette=cassette)
+        session.adapters["http://"].adapter = None
+        replayed = [session.get("/foo"), session.post("/bar", json={"a": 1}), session.get("/bytes/10")]
+
+    for rec, rep in zip(recorded, replayed):
+        assert isinstance(rep, Response)
+        assert rep.status_code == rec.status_code
+        assert rep.headers == rec.headers
+        assert rep.content == rec.content
+        assert rep.url == rec.url
+    assert replayed[1].json() == {"path": "/bar", "body": '{"a": 1}'}
+    assert_logs(
+        lcc_mock,
+        ".+GET .+/foo", ".+200", 'HTTP response body.+"/foo"',
+        ".+POST .+/bar", "HTTP request body.+", ".+201", 'HTTP response body.+"/bar"',
+        ".+GET .+/bytes/10", ".+200", "HTTP response body.+xxxxxxxxxx",
+    )
+
+
+def test_cassette_replay_occurrences(tmp_path):
+    path = str(tmp_path / "cassette.db")
+    with Cassette(path, "record") as cassette:
+        for i in range(2):
+            session = mock_session(text=str(i))
+            session.mount("http://", CassetteAdapter(cassette, session.adapters["http://"]))
+            session.get("http://www.example.net")
+
+    with Cassette(path) as cassette:
+        session = Session(logger=Logger.off(), cassette=cassette)
+        assert [session.get("http://www.example.net").text for _ in range(3)] == ["0", "1", "1"]
+        with pytest.raises(InteractionNotRecorded):
+            session.get("http://www.example.net/other")
+
+
+def test_cassette_record_again(tmp_path):
+    path = str(tmp_path / "cassette.db")
+    for texts in (("0", "1"), ("2",)):
+        with Cassette(path, "record") as cassette:
+            for text in texts:
+                session = mock_session(text=text)
+                session.mount("http://", CassetteAdapter(cassette, session.adapters["http://"]))
+                session.get("http://www.example.net")
+
+    # the previous recording has been discarded
+    with Cassette(path) as cassette:
+        session = Session(logger=Logger.off(), cassette=cassette)
+        assert [session.get("http://www.example.net").text for _ in range(2)] == ["2", "2"]
+
+
+def test_cassette_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "cassette.db"), "foo")
+
+
+def test_prepare_request_outside_of_request(lcc_mock):
+    session = Session(logger=Logger.off())
+    session.logger.request_line_logging = True
+    session.prepare_request(requests.Request("GET", "http://www.example.net"))
+    assert_logs(lcc_mock, r"HTTP request.+GET http://www\.example\.net")
+
+
 def test_response_constructor():
     # see comment in Response.__init__
     # this test is here to make test coverage happy
@@ -544,6 +2025,127 @@ def test_raise_unless_ok():
         do(lambda r: r.raise_unless_ok())
 
 
+def with_elapsed(resp, seconds):
+    resp.elapsed = timedelta(seconds=seconds)
+    return resp
+
+
+def test_response_check_elapsed_success():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 0.5).check_elapsed(1.0)). \
+        assert_log_success(callee.Regex(".*response time.*1\\.0.*"), callee.Regex(".*0\\.5.*"))
+
+
+def test_response_check_elapsed_failure():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 1.5).check_elapsed(1.0)). \
+        assert_log_failure(callee.Regex(".*response time.*1\\.0.*"), callee.Regex(".*1\\.5.*"))
+
+
+def test_response_check_elapsed_matcher():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 0.5).check_elapsed(greater_than(1.0))). \
+        assert_log_failure(callee.Regex(".*greater than 1\\.0.*"), callee.Regex(".*0\\.5.*"))
+
+
+def test_response_require_elapsed_failure():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 1.5).require_elapsed(1.0), raises=AbortTest). \
+        assert_log_failure(callee.Regex(".*response time.*"), callee.Regex(".*1\\.5.*"))
+
+
+def test_response_assert_elapsed_success():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 0.5).assert_elapsed(1.0)). \
+        assert_no_log()
+
+
+def test_raise_unless_faster_than_success():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 0.5).raise_unless_faster_than(1.0))
+
+
+def test_raise_unless_faster_than_failure():
+    mock_200(). \
+        do(lambda r: with_elapsed(r, 1.0).raise_unless_faster_than(1.0),
+           raises=ResponseTooSlow,
+           match=r"expected response time to be less than 1\.000s, got 1\.000s")
+
+
+def make_budget_response(method, url, seconds):
+    resp = Response()
+    resp.request = requests.Request(method, url).prepare()
+    resp.elapsed = timedelta(seconds=seconds)
+    return resp
+
+
+def test_latency_budget_get_limit():
+    budget = LatencyBudget(default=1.0, endpoints={"GET /users/{id}": 0.2, "/users/{id}": 0.5})
+    assert budget.get_limit("GET", "http://www.example.net/users/1") == 0.2
+    assert budget.get_limit("delete", "http://www.example.net/users/1") == 0.5
+    assert budget.get_limit("GET", "http://www.example.net/search") == 1.0
+    assert LatencyBudget().get_limit("GET", "http://www.example.net/search") is None
+
+
+def test_latency_budget_endpoint_limit(lcc_mock):
+    budget = LatencyBudget(endpoints={"/users/{id}": 0.5})
+    budget.check(make_budget_response("GET", "http://www.example.net/users/1", 0.4))
+    budget.check(make_budget_response("GET", "http://www.example.net/search", 10))
+    lcc_mock.log_check.assert_not_called()
+    budget.check(make_budget_response("GET", "http://www.example.net/users/1", 0.6))
+    lcc_mock.log_check.assert_called_once_with(
+        "Expect GET /users/{id} to respond within 0.500s", False, "got 0.600s"
+    )
+
+
+def test_latency_budget_per_test_limit(lcc_mock, mocker):
+    location = mocker.patch("lemoncheesecake_requests._get_report_location", return_value="test_1")
+    budget = LatencyBudget(per_test=1.0)
+    for _ in range(4):
+        budget.check(make_budget_response("GET", "http://www.example.net/users/1", 0.4))
+    lcc_mock.log_check.assert_called_once_with(
+        "Expect the cumulative HTTP response time of the test to be within 1.000s", False, "got 1.200s"
+    )
+
+    lcc_mock.reset_mock()
+    location.return_value = "test_2"
+    budget.check(make_budget_response("GET", "http://www.example.net/users/1", 0.4))
+    lcc_mock.log_check.assert_not_called()
+
+
+def test_latency_budget_per_test_limit_interleaved(lcc_mock, mocker):
+    location = mocker.patch("lemoncheesecake_requests._get_report_location")
+    budget = LatencyBudget(per_test=1.0)
+    # two tests running in parallel do not reset each other's cumulative response time
+    for _ in range(3):
+        for test in ("test_1", "test_2"):
+            location.return_value = test
+            budget.check(make_budget_response("GET", "http://www.example.net/users/1", 0.4))
+    assert lcc_mock.log_check.call_count == 2
+
+
+def test_latency_budget_per_test_limit_map(lcc_mock, mocker):
+    # lemoncheesecake only knows the report location of the test thread, not the one of map() worker threads
+    main_thread = threading.get_ident()
+    mocker.patch(
+        "lemoncheesecake.session.Session.get",
+        side_effect=lambda: Mock(cursor=Mock(location="test_a" if threading.get_ident() == main_thread else None))
+    )
+    budget = LatencyBudget(per_test=1.0)
+    session = mock_session(Session(logger=Logger.off(), latency_budget=budget))
+    session.map(["http://www.example.net"] * 4, max_workers=4)
+    assert list(budget._tests) == ["test_a"]
+
+
+def test_latency_budget_session(lcc_mock, mocker):
+    budget = LatencyBudget(default=1.0)
+    check = mocker.spy(budget, "check")
+    session = mock_session(Session(logger=Logger.off(), latency_budget=budget))
+    resp = session.get("http://www.example.net")
+    check.assert_called_once_with(resp)
+    lcc_mock.log_check.assert_not_called()
+
+
 def test_check_header_success():
     mock_application_json(). \
         do(lambda r: r.check_header("Content-Type", "application/json")). \
@@ -652,5 +2254,271 @@ def test_assert_json_failure():
         assert_log_failure(callee.Contains("baz"), callee.Contains("bar"))
 
 
+LARGE_JSON = {
+    "count": 2, "items": [{"id": 1, "tags": ["a", "]"]}, {"id": 2, "nested": {"x": [[], {}]}}],
+    "empty": {}, "text": "café \\\"}", "number": -1.5e3, "flags": [True, False, None], "last": 12345
+}
+
+
+def test_check_json_incremental_success(mocker):
+    json_spy = mocker.spy(requests.Response, "json")
+    mock_response(json=LARGE_JSON). \
+        do(lambda r: r.check_json({"count": equal_to(2), "last": equal_to(12345)}, incremental=True)). \
+        assert_log_success(callee.Regex(r".+last.+"), callee.Contains("12345"))
+    json_spy.assert_not_called()
+
+
+def test_check_json_incremental_failure():
+    mock_response(json=LARGE_JSON). \
+        do(lambda r: r.check_json({"missing": equal_to(1)}, incremental=True)). \
+        assert_log_failure(callee.Contains("missing"), callee.Contains("No entry"))
+
+
+def test_require_json_incremental_failure():
+    mock_response(json=LARGE_JSON). \
+        do(lambda r: r.require_json({"items": has_length(3)}, incremental=True), raises=AbortTest). \
+        assert_log_failure(callee.Contains("items"), callee.Contains("2"))
+
+
+def test_assert_json_incremental_success():
+    mock_response(json=LARGE_JSON). \
+        do(lambda r: r.assert_json({"empty": equal_to({}), "number": equal_to(-1500.0)}, incremental=True)). \
+        assert_no_log()
+
+
+def test_check_json_incremental_not_utf8(mocker):
+    json_spy = mocker.spy(requests.Response, "json")
+    mock_response(content=json.dumps({"foo": "bar"}).encode("utf-16")). \
+        do(lambda r: r.check_json({"foo": equal_to("bar")}, incremental=True)). \
+        assert_log_success(callee.Regex(r".+foo.+"))
+    json_spy.assert_called_once()
+
+
+def test_check_json_incremental_streamed(http_server):
+    session = Session(base_url=http_server, logger=Logger.off())
+    resp = session.get("/foo", stream=True)
+    with patch("lemoncheesecake.matching.operations.log_check") as log_check_mock:
+        resp.check_json({"path": equal_to("/foo")}, incremental=True)
+    log_check_mock.assert_called_once_with(callee.Regex(r".+path.+"), True, callee.Contains("/foo"))
+
+
+@pytest.mark.parametrize("chunk_size", (1, 2, 3, 7, 4096))
+@pytest.mark.parametrize("keys", (["count"], ["items", "last"], ["empty", "text"], ["number", "flags"], ["missing"]))
+def test_json_object_scanner(chunk_size, keys):
+    content = json.dumps(LARGE_JSON, ensure_ascii=False).encode("utf-8")
+    chunks = (content[offset:offset + chunk_size] for offset in range(0, len(content), chunk_size))
+    assert _JsonObjectScanner(chunks).read_items(keys) == {key: LARGE_JSON[key] for key in keys if key in LARGE_JSON}
+
+
+def test_json_object_scanner_stops_early():
+    chunks = iter([b'{"foo": 1, ', b'"bar": [1, 2], ', b'"baz": 3}'])
+    assert _JsonObjectScanner(chunks).read_items(["foo"]) == {"foo": 1}
+    assert next(chunks) == b'"bar": [1, 2], '
+
+
+def test_json_object_scanner_duplicated_key():
+    # the scan stops at the first occurrence of the key whereas json.loads() keeps the last one
+    assert _JsonObjectScanner([b'{"b": 2, "b": 3}']).read_items(["b"]) == {"b": 2}
+
+
+@pytest.mark.parametrize("content", (b"[1]", b'{"foo" 1}', b'{"foo": tru}', b'{"foo": "bar', b'{"foo": [1', b'{"a": 1 "b": 2}'))
+def test_json_object_scanner_invalid(content):
+    with pytest.raises(ValueError):
+        _JsonObjectScanner([content]).read_items(["missing"])
+
+
+ITEM_EXPECTATION = Expectation(
+    status_code=is_2xx(), headers={"Content-Type": "application/json"}, json={"foo": equal_to("bar")}
+)
+
+
+def expectation_session(**kwargs):
+    return mock_session(headers={"Content-Type": "application/json"}, json={"foo": "bar"}, **kwargs)
+
+
+def test_expectation_check_success(lcc_mock):
+    expectation_session().get("http://www.example.net").check(ITEM_EXPECTATION)
+    assert lcc_mock.log_check.mock_calls == [
+        (("Expect HTTP status code to be 2xx", True, "Got 200"),),
+        (('Expect "Content-Type" to be equal to "application/json"', True, 'Got "application/json"'),),
+        (('Expect "foo" to be equal to "bar"', True, 'Got "bar"'),),
+    ]
+
+
+def test_expectation_same_logs_as_check_methods(lcc_mock):
+    resp = expectation_session().get("http://www.example.net")
+    with patch("lemoncheesecake.matching.operations.log_check") as log_check_mock:
+        resp.check_ok().check_headers({"Content-Type": "application/json"}).check_json({"foo": equal_to("bar")})
+    resp.check(ITEM_EXPECTATION)
+    assert lcc_mock.log_check.mock_calls == log_check_mock.mock_calls
+
+
+def test_expectation_check_failure(lcc_mock):
+    expectation_session(status_code=404).get("http://www.example.net").check(
+        Expectation(status_code=200, json={"foo": equal_to("baz")})
+    )
+    assert lcc_mock.log_check.mock_calls == [
+        (("Expect HTTP status code to be equal to 200", False, "Got 404"),),
+        (('Expect "foo" to be equal to "baz"', False, 'Got "bar"'),),
+    ]
+
+
+def test_expectation_require_failure(lcc_mock):
+    with pytest.raises(AbortTest):
+        expectation_session(status_code=404).get("http://www.example.net").require(ITEM_EXPECTATION)
+    lcc_mock.log_check.assert_called_once_with("Expect HTTP status code to be 2xx", False, "Got 404")
+
+
+def test_expectation_assert_success(lcc_mock):
+    expectation_session().get("http://www.example.net").assert_(ITEM_EXPECTATION)
+    lcc_mock.log_check.assert_not_called()
+
+
+def test_expectation_assert_failure(lcc_mock):
+    with pytest.raises(AbortTest):
+        expectation_session().get("http://www.example.net").assert_(Expectation(headers={"Content-Type": "text/html"}))
+    lcc_mock.log_check.assert_called_once_with(
+        'Expect "Content-Type" to be equal to "text/html"', False, 'Got "application/json"'
+    )
+
+
+def test_expectation_failure_flushes_deferred_logs(lcc_mock):
+    session = mock_session(Session(logger=Logger.deferred()), status_code=500)
+    resp = session.get("http://www.example.net")
+    lcc_mock.reset_mock()
+    resp.check(Expectation(status_code=is_2xx()))
+    assert re.match(r"HTTP request:\n  > GET http://www\.example\.net", lcc_mock.log_info.mock_calls[0].args[0])
+
+
+def test_expectation_matchers_built_once(lcc_mock, mocker):
+    expectation = Expectation(status_code=200, headers={"Content-Type": "application/json"})
+    transformer = mocker.patch("lemoncheesecake_requests.MatcherDescriptionTransformer")
+    build_matchers = mocker.patch("lemoncheesecake_requests.has_entry")
+    session = expectation_session()
+    for _ in range(3):
+        session.get("http://www.example.net").check(expectation)
+    assert lcc_mock.log_check.call_count == 6
+    transformer.assert_not_called()
+    build_matchers.assert_not_called()
+
+
+def test_json_decoded_once(lcc_mock, mocker):
+    json_spy = mocker.spy(requests.Response, "json")
+    session = mock_session(Session(logger=Logger.on()), json={"foo": "bar"})
+    with patch("lemoncheesecake.matching.operations.log_check"):
+        session.get("http://www.example.net"). \
+            check_json({"foo": equal_to("bar")}). \
+            require_json({"foo": equal_to("bar")}). \
+            assert_json({"foo": equal_to("bar")})
+    assert json_spy.call_count == 1
+
+
+def test_json_decoding_error_memoized(mocker):
+    json_spy = mocker.spy(requests.Response, "json")
+    resp = mock_session(text="not json").get("http://www.example.net")
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            resp._json()
+    with pytest.raises(ValueError):
+        resp.json()
+    assert json_spy.call_count == 1
+
+
+def test_json_memoization_invalidated_on_content_change():
+    resp = mock_session(json={"foo": "bar"}).get("http://www.example.net")
+    assert resp._json() == {"foo": "bar"}
+    resp._content = b'{"foo": "baz"}'
+    assert resp._json() == {"foo": "baz"}
+    assert resp.json() == {"foo": "baz"}
+
+
+def test_json_not_shared(lcc_mock):
+    session = mock_session(Session(logger=Logger.deferred()), json={"foo": "bar"})
+    resp = session.get("http://www.example.net")
+    # the object returned by json() can be modified without altering what is checked and logged
+    resp.json()["foo"] = "baz"
+    assert resp.json() == {"foo": "bar"}
+    with patch("lemoncheesecake.matching.operations.log_check") as log_check:
+        resp.check_json({"foo": equal_to("bar")})
+        assert log_check.call_args.args[1] is True
+    resp.json()["foo"] = "baz"
+    session.logger.flush()
+    assert lcc_mock.log_info.call_args.args[0] == 'HTTP response body (application/json):\n{\n    "foo": "bar"\n}'
+
+
+def test_json_with_kwargs_not_memoized():
+    resp = mock_session(json={"foo": 1.5}).get("http://www.example.net")
+    assert resp.json() == {"foo": 1.5}
+    assert resp.json(parse_float=str) == {"foo": "1.5"}
+    assert resp.json() == {"foo": 1.5}
+
+
+@pytest.fixture
+def orjson_backend():
+    pytest.importorskip("orjson")
+    set_json_backend("orjson")
+    yield get_json_backend()
+    set_json_backend("json")
+
+
+JSON_SAMPLE = {
+    "a": [1, 2.5, 1e16, 1e-7, -3.2e-10, 1.5e300, True, None, "é\n\u0001\"\\/", [], {}, "x\": 1e5"],
+    "b\": 1e5": {"c": {"d": [[]]}},
+    "ü": 12345678901234567,
+    "f": 0.0001
+}
+
+
+def test_json_backend_default():
+    assert type(get_json_backend()) is JsonBackend
+
+
+def test_json_backend_unknown():
+    with pytest.raises(ValueError):
+        set_json_backend("foo")
+
+
+def test_json_backend_auto(orjson_backend):
+    set_json_backend("json")
+    set_json_backend("auto")
+    assert isinstance(get_json_backend(), OrjsonBackend)
+
+
+@pytest.mark.parametrize("data", (
+    JSON_SAMPLE, 1e16, [1e-7], "1e5", {}, 1e-05, -1e-05, 8.530132475717321e-05, [9.999999999999999e-05, 0.0001],
+    {"a": 1.5e-05, "b": "0.00001"}, {"a": float("nan"), "b": [float("inf"), None], "c": -float("inf")}
+))
+def test_orjson_backend_same_output(orjson_backend, data):
+    assert orjson_backend.dumps(data) == JsonBackend().dumps(data)
+
+
+def test_orjson_backend_fallback(orjson_backend):
+    data = {1: 2 ** 70}
+    assert orjson_backend.dumps(data) == JsonBackend().dumps(data)
+    assert orjson_backend.loads('{"foo": %d}' % 2 ** 70) == {"foo": 2 ** 70}
+
+
+def test_orjson_backend_dump(orjson_backend):
+    fh = io.BytesIO()
+    orjson_backend.dump(JSON_SAMPLE, fh)
+    assert fh.getvalue().decode("utf-8") == JsonBackend().dumps(JSON_SAMPLE)
+
+
+def test_orjson_backend_response(lcc_mock, mocker, orjson_backend):
+    loads_spy = mocker.spy(orjson_backend, "loads")
+    session = mock_session(json=JSON_SAMPLE)
+    session.logger.response_body_logging = True
+    resp = session.get("http://www.example.net")
+    assert resp._json() == JSON_SAMPLE
+    assert loads_spy.call_count == 1
+    assert_logs(lcc_mock, "HTTP response body.+" + re.escape(JsonBackend().dumps(JSON_SAMPLE)))
+
+
+def test_orjson_backend_response_not_json(orjson_backend):
+    resp = mock_session(text="not json").get("http://www.example.net")
+    with pytest.raises(ValueError):
+        resp.json()
+
+
 def test_version():
     assert re.match(r"^\d+\.\d+\.\d+$", __version__)